@@ -1,9 +1,21 @@
 # Import necessary libraries
+import os
+import sys
 import time
-import json
+import threading
+import logging  # For the periodic metrics log
+import numpy as np  # For downsampling the plots
 import regex as re  # For regular expressions
-import yfinance as yf  # For fetching financial data
-from textual import on  # For event handling in textual
+from Core import (
+    METRICS, METRICS_LOG, METRICS_LOG_INTERVAL, POLL_FACTORS, RECORDINGS_DIR,
+    SETTINGS_FILE, SETTINGS_POLL, CurrencyConvert, FileWatcher,
+    PollScheduler, PortfolioValuation, ReplayQuoteSource, StockManager,
+    create_quote_source, create_replay_symbols, create_symbols,
+    Lots, get_settings, load_holdings, load_recording, logger,
+    market_phase, record_session, reload_settings
+)  # Data and valuation pipeline
+from textual import on, work  # For event handling and workers
+from textual.message import Message
 from textual.screen import ModalScreen
 from textual.app import App, ComposeResult  # Main app and composition
 from textual_plot import PlotWidget, HiResMode  # For plotting widgets
@@ -16,74 +28,18 @@ from textual.containers import (
 )
 
 
-class Settings:
-    """
-    Loads and stores application settings from
-    a JSON file. Provides attributes for PERIOD,
-    INTERVAL, UPDATE_INTERVAL, and LOCAL_CURRENCY.
-    """
-
-    def __init__(self, filename="settings.json"):
-        settings = load_settings(filename)
-        self.PERIOD = settings.get("PERIOD")
-        self.INTERVAL = settings.get("INTERVAL")
-        self.UPDATE_INTERVAL = settings.get("UPDATE_INTERVAL")
-        self.LOCAL_CURRENCY = settings.get("LOCAL_CURRENCY")
-
-
-# For dictionary of holdings: "TICKER": [QUANTITY, VALUE IN LOCAL CURRENCY]
-def load_holdings(filename="holdings.json"):
-    """
-    Load holdings data from a JSON file.
-
-    Attempts to open and parse the specified JSON
-    file containing the user's stock holdings.
-    Each holding should be structured as
-    "TICKER": [QUANTITY, VALUE IN LOCAL CURRENCY].
-    If the file does not exist, returns an empty
-    dictionary.
-
-    Args:
-        filename (str): The path to the JSON file containing holdings data.
-
-    Returns:
-        dict: A dictionary mapping ticker symbols to their quantity and value.
-    """
-    try:
-        with open(filename, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-
-
-def load_settings(filename="settings.json"):
-    """
-    Load application settings
-    from a JSON file.
-
-    Reads the specified JSON file to load
-    user-configurable settings such as
-    PERIOD, INTERVAL, and UPDATE_INTERVAL.
-    These settings control the timespan of data
-    to fetch, the data granularity, and
-    how often prices are updated.
-    If the file does not exist,
-    returns an empty dictionary.
-
-
-    Args:
-        filename (str): The path to the JSON
-        file containing application settings.
-
-    Returns:
-        dict: A dictionary containing settings for
-        PERIOD, INTERVAL, LOCAL_CURRENCY, and UPDATE_INTERVAL.
-    """
-    try:
-        with open(filename, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+TICK_FLUSH = 0.25  # Seconds between UI updates from streamed quotes
+# Lines per SymbolTicker in the list: its height of 20 plus the margin
+# of 1 it shares with the next ticker, see style.tcss
+TICKER_ROW_HEIGHT = 21
+TICKER_OVERSCAN = 2  # Tickers kept mounted beyond each viewport edge
+# Indicators drawn over the price plot and their line colors
+OVERLAY_STYLES = {"sma": "yellow", "ema": "cyan", "vwap": "magenta",
+                  "bb_upper": "grey50", "bb_lower": "grey50"}
+CANDLE_RISING = "green"  # Body and volume color when close >= open
+CANDLE_FALLING = "red"  # Body and volume color when close < open
+CANDLE_WICK = "grey50"  # Color of the high to low range
+PLOT_MARGIN_BOTTOM = 3  # Rows below a line plot, textual_plot's default
 
 
 def Clean_symbol(symbol):
@@ -103,91 +59,85 @@ def Clean_symbol(symbol):
     return re.sub(r'[^a-zA-Z0-9]', '', str(symbol))
 
 
-class StockManager:
+def downsample(x, y, bucket_size):
     """
-    Manages a collection of SymbolData objects representing stock holdings.
-
-    Provides methods to add new stock data and access them in a
-    dictionary-like manner. Used as a central repository for all
-    stock-related data within the application.
-    """
-
-    def __init__(self):
-        self.stocks = {}  # Dictionary to hold stock objects
-
-    def add_stock(self, stock):
-        """
-        Add a SymbolData object to the manager.
-
-        Args:
-            stock (SymbolData): The stock data object to add.
-        """
-        self.stocks[stock.symbol] = stock
+    Reduce a series to the minimum and maximum of each bucket of points.
 
-    def __getitem__(self, key):
-        """
-        Retrieve a SymbolData object by its symbol.
-
-        Args:
-            key (str): The symbol of the stock to retrieve.
-
-        Returns:
-            SymbolData: The corresponding stock data object.
-        """
-        return self.stocks[key]
+    Splits the series into buckets of bucket_size consecutive points and
+    keeps only each bucket's lowest and highest point, in their original
+    order, so spikes and dips survive the reduction. The last point is
+    always kept so the plot ends at the current price.
 
+    Args:
+        x (ndarray): Horizontal positions.
+        y (ndarray): Values at those positions.
+        bucket_size (int): Number of points per bucket.
 
-class CurrencyConvert:
-    def __init__(self, stock_manager):
-        self.currency_cache = {}  # {currencystring: (timestamp, last_close)}
-        self.stock_manager = stock_manager
-
-    def convert_to_local_currency(self, symbol):
-        """
-        Convert the last closing price of a symbol to the local currency.
-        Fetches the latest exchange rate using Yahoo Finance and converts the
-        stock's closing price to the local currency.
-        Args:
-            symbol (str): The symbol to convert.
-        Returns:
-            float: The converted price in local currency.
-        """
-        stocklastclosed = self.stock_manager[symbol].close.iloc[-1]
-        currencystring = (Settings().LOCAL_CURRENCY  # Currency Pair string
-                          + self.stock_manager[symbol].currency + "=X")
-
-        now = time.time()
-        cache = self.currency_cache.get(currencystring)
-        if cache is None or now - cache[0] > 60:
-            currencyticker = yf.Ticker(currencystring)
-            history = currencyticker.history()
-            currencylastclosed = history['Close'].iloc[-1]
-            self.currency_cache[currencystring] = (now, currencylastclosed)
-        else:
-            currencylastclosed = cache[1]
+    Returns:
+        tuple: The reduced x and y arrays.
+    """
+    n = len(y)
+    if n <= 2 or bucket_size <= 1:
+        return x, y
+    bucket = np.arange(n) // bucket_size
+    order = np.lexsort((y, bucket))  # By bucket, then by value
+    starts = np.flatnonzero(np.diff(bucket[order], prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+    keep = np.union1d(np.union1d(order[starts], order[ends]), [n - 1])
+    return x[keep], y[keep]
+
+
+def candles(open, high, low, close, volume, first, columns):
+    """
+    Aggregate bars into at most one candle per plot column.
 
-        value = stocklastclosed / currencylastclosed  # Convert local currency
-        return value
+    Every candle covers the same number of bars and candle boundaries
+    are aligned to the running bar index, so a candle keeps its bars
+    when old bars are evicted from the front. Each field is reduced for
+    all candles at once, so the cost is a few passes over the bars.
 
+    Args:
+        open (ndarray): Opening prices.
+        high (ndarray): High prices.
+        low (ndarray): Low prices.
+        close (ndarray): Closing prices.
+        volume (ndarray): Volume.
+        first (int): Running index of the first bar.
+        columns (int): Number of plot columns.
 
-def create_symbols():
+    Returns:
+        tuple: Bars per candle, start of the first candle relative to
+        the first bar (zero or negative), index of the last bar of each
+        candle, and the open, high, low, close and volume arrays of the
+        candles.
     """
-    Create SymbolData objects for each holding in the user's portfolio.
-
-    Iterates through the loaded holdings and instantiates a
-    SymbolData object for each, using the symbol, quantity, and purchase value.
-    Returns a list of these objects.
+    n = len(close)
+    size = max(1, -(-n // max(1, columns - 1)))  # Room for a partial candle
+    offset = -(first % size)  # First candle may start before the first bar
+    starts = np.arange(offset, n, size)
+    starts[0] = 0
+    ends = np.append(starts[1:], n) - 1
+    return (size, offset, ends, open[starts],
+            np.maximum.reduceat(high, starts),
+            np.minimum.reduceat(low, starts), close[ends],
+            np.add.reduceat(volume, starts))
+
+
+class PricesUpdated(Message, bubble=False):
+    """
+    Sent by SymbolWatcher to price widgets after each fetch cycle.
 
-    Returns:
-        list: A list of SymbolData instances for each holding.
+    Args:
+        symbols (frozenset): Symbols whose data changed in this cycle.
+        changed (ndarray): Valuation rows whose local close moved in this
+            cycle, captured when posting since a later update replaces
+            PortfolioValuation.changed before the message is handled.
     """
-    stocks = []
-    for symbol in HOLDINGS.keys():
-        quantity = HOLDINGS[symbol][0]  # Get quantity
-        value = HOLDINGS[symbol][1]  # Get value
-        stock = SymbolData(symbol, quantity, value)  # SymbolData instance
-        stocks.append(stock)  # Add to list
-    return stocks
+
+    def __init__(self, symbols, changed=()):
+        super().__init__()
+        self.symbols = symbols
+        self.changed = changed
 
 
 class HelpScreen(ModalScreen):
@@ -204,67 +154,40 @@ class HelpScreen(ModalScreen):
             yield Label("Remember to set correctly configure settings(.json) "
                         "and holdings(.json) in appropriate json files")
             yield Label(
-                f"All values are presented in {Settings().LOCAL_CURRENCY} "
+                f"All values are presented in {get_settings().LOCAL_CURRENCY} "
                 f"for the Overview"
             )
             yield Label(
-                f"All values are NOT presented in {Settings().LOCAL_CURRENCY}"
+                f"All values are NOT presented in {get_settings().LOCAL_CURRENCY}"
                 "for the Plots/Graphs"
                  )
             yield Label("Press ESC to exit")
 
 
-class SymbolData():
+class MetricsScreen(ModalScreen):
     """
-    Represents and fetches financial data for a single stock symbol.
-
-    On initialization, retrieves historical price and
-    volume data from Yahoo Finance, stores relevant information such as
-    open, close, high, low, and volume, and determines the
-    currency of the stock. Used as the data model for each holding.
+    Modal screen showing the stage timings and counters in METRICS.
 
-    Attributes:
-        symbol (str): The stock symbol.
-        quantity (float): Number of shares held.
-        value (float): Purchase value per share in local currency.
-        history (DataFrame): Historical price data.
-        datetime (list): List of indices for plotting.
-        close (Series): Closing prices.
-        open (Series): Opening prices.
-        high (Series): High prices.
-        low (Series): Low prices.
-        volume (Series): Volume data.
-        currency (str): Currency of the stock.
+    Refreshed every second while open. Can be dismissed with the Escape
+    key or by pressing "m" again.
     """
-    def __init__(self, symbol, quantity, value):
-        self.symbol = symbol
-        self.quantity = quantity
-        self.value = value
-        stock = yf.Ticker(self.symbol)  # Fetch ticker data
-        self.history = stock.history(   # Get historical data
-            period=Settings().PERIOD,
-            interval=Settings().INTERVAL
-            )
-        self.datetime = self.history.index  # Get datetime index
-        self.datetime = list(range(len(self.datetime)))  # Convert to list
-        self.close = self.history["Close"]  # Closing prices
-        self.open = self.history["Open"]  # Opening prices
-        self.high = self.history["High"]  # High prices
-        self.low = self.history["Low"]  # Low prices
-        self.volume = self.history["Volume"]  # Volume data
-        self.currency = stock.info["currency"]  # Currency of the stock
+    BINDINGS = [("escape", "dismiss"), ("m", "dismiss")]
 
-    def __repr__(self):
-        """
-        Return a string representation of the SymbolData object for debugging.
+    def compose(self) -> ComposeResult:
+        with Container(id="metrics-screen-container"):
+            yield Label(id="metrics")
+            yield Label("Press ESC to exit")
 
-        Returns:
-            str: Debug string with symbol, quantity, and price.
+    def on_mount(self) -> None:
+        self.update_metrics()
+        self.set_interval(1, self.update_metrics)
+
+    def update_metrics(self) -> None:
         """
-        return (f'Stock({self.symbol!r}), '
-                f'Quant({self.quantity!r}), '
-                f'Price({self.value!r})'
-                )
+        Show the current metrics.
+        """
+        lines = METRICS.lines() or ["No metrics recorded yet"]
+        self.query_one("#metrics", expect_type=Label).update("\n".join(lines))
 
 
 class PortfolioOverview(Container):
@@ -273,17 +196,20 @@ class PortfolioOverview(Container):
 
     Shows each holding's symbol, current price
     (converted to local currency if needed), actual value, and change from
-    purchase value. Also displays total portfolio worth and total change.
-    Periodically refreshes prices and updates the display.
+    purchase value. Also displays total portfolio worth and total change,
+    and the worth and change of each account when lots are held in more
+    than one. Updates the display after each fetch cycle.
 
     Args:
         stock_manager (StockManager): The manager containing
         all SymbolData objects.
+        valuation (PortfolioValuation): Computes values and totals.
     """
-    def __init__(self, stock_manager, currency_convert, *args, **kwargs):
+    def __init__(self, stock_manager, valuation, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.stock_manager = stock_manager  # Reference to StockManager
-        self.currency_convert = currency_convert
+        self.valuation = valuation  # Reference to PortfolioValuation
+        self.status = "Loading holdings..."  # Age of the shown prices
 
     def compose(self) -> ComposeResult:
         """
@@ -295,122 +221,115 @@ class PortfolioOverview(Container):
         Returns:
             ComposeResult: The composed UI elements.
         """
-        total = 0  # Total portfolio value
-        total_change = 0  # Total change in value
+        self.labels = []  # (close, actual, change) Labels per symbol
+        self.shown = {}  # {Label: text} as last written
         with HorizontalGroup(classes="allsymbols"):
-            for symbol in HOLDINGS.keys():
+            for i, symbol in enumerate(self.valuation.symbols):
+                clean = Clean_symbol(symbol)  # Sanitized once per symbol
+                labels = (Label(self.format_close(i), id=clean),
+                          Label(self.format_actual(i), id=f"{clean}actual"),
+                          Label(self.format_change(i), id=f"{clean}change"))
+                self.labels.append(labels)
                 with VerticalGroup(classes="symbol"):
                     yield Label(f"{symbol}")  # Symbol label
                     with HorizontalGroup(classes="symbolclosed"):
-                        # Show close price, convert if needed
-                        if (self.stock_manager[symbol].currency 
-                            == Settings().LOCAL_CURRENCY):
-                            yield Label(f"Close: "
-                                        f"{self.stock_manager[symbol].close.iloc[-1]:.2f}"
-                                        f":{self.stock_manager[symbol].currency}",
-                                        id=f"{Clean_symbol(symbol)}"
-                                        )
-                        else:
-                            convertedlaststock = (
-                                self.currency_convert.convert_to_local_currency(symbol))
-                            yield Label(f"Close: {convertedlaststock:.2f}"
-                                        f":{Settings().LOCAL_CURRENCY}",
-                                        id=f"{Clean_symbol(symbol)}")
+                        # Close price converted to local currency
+                        yield labels[0]
                     with VerticalGroup(classes="symbolactual"):
-                        # Calculate actual value (converted if needed)
-                        if self.stock_manager[symbol].currency == Settings().LOCAL_CURRENCY:
-                            actualvalue = (self.stock_manager[symbol].close.iloc[-1]
-                                           * self.stock_manager[symbol].quantity)
-                            total += actualvalue
-                        else:
-                            actualvalue = (self.currency_convert.convert_to_local_currency(symbol)
-                                           * self.stock_manager[symbol].quantity)
-                            total += actualvalue
-                        yield Label(f"Actual: {actualvalue:.2f}", id=f"{Clean_symbol(symbol)}actual")
+                        yield labels[1]
                     with VerticalGroup(classes="symbolchange"):
-                        # Calculate change from purchase value
-                        purchased_value = (self.stock_manager[symbol].quantity
-                                           * self.stock_manager[symbol].value)
-                        change = actualvalue - purchased_value
-                        total_change += change
-                        yield Label(f"Changed: {change:.2f}",
-                                    id=f"{Clean_symbol(symbol)}change")
+                        yield labels[2]
         # Show totals
-        yield Label(f"TOTAL WORTH: {total:.2f}:{Settings().LOCAL_CURRENCY} ::: "
-                    f"TOTAL CHANGE: {total_change:.2f}:{Settings().LOCAL_CURRENCY}",
-                    id=f"{Clean_symbol(symbol)}total", classes="allsymbols")
+        self.total_label = Label(self.format_total(), id="total",
+                                 classes="allsymbols")
+        yield self.total_label
+        self.account_label = Label(self.format_accounts(), id="accounts",
+                                   classes="allsymbols")
+        self.account_label.display = len(self.valuation.accounts) > 1
+        yield self.account_label
+        yield Label(self.status, id="status")
+
+    def write(self, label, text) -> None:
+        """
+        Update a label only if its text differs from what it shows.
 
-    async def on_mount(self) -> None:
+        Args:
+            label (Label): The label to update.
+            text (str): The new text.
         """
-        Set up periodic price refresh when the widget is mounted.
+        if self.shown.get(label) != text:
+            self.shown[label] = text
+            label.update(text)
 
-        Starts a timer to refresh prices at the
-        interval specified by UPDATE_INTERVAL.
+    def update_status(self, text) -> None:
         """
-        self.set_interval(Settings().UPDATE_INTERVAL, self.refresh_price)
+        Show how fresh the displayed prices are.
 
-    async def refresh_price(self) -> None:
+        Args:
+            text (str): The status text.
+        """
+        self.status = text  # Kept for the next recompose
+        # The label is briefly missing while the overview recomposes
+        for label in self.query("#status").results(Label):
+            label.update(text)
+
+    def format_close(self, i):
+        """Format the close price of the i-th symbol."""
+        return (f"Close: {self.valuation.close[i]:.2f}"
+                f":{get_settings().LOCAL_CURRENCY}")
+
+    def format_actual(self, i):
+        """Format the current value of the i-th symbol."""
+        return f"Actual: {self.valuation.actual[i]:.2f}"
+
+    def format_change(self, i):
+        """Format the change from purchase value of the i-th symbol."""
+        return f"Changed: {self.valuation.change[i]:.2f}"
+
+    def format_total(self):
+        """Format the total worth and total change line."""
+        currency = get_settings().LOCAL_CURRENCY
+        return (f"TOTAL WORTH: {self.valuation.total:.2f}:{currency} ::: "
+                f"TOTAL CHANGE: {self.valuation.total_change:.2f}:{currency}")
+
+    def format_accounts(self):
+        """Format the worth and change of each account, one per line."""
+        currency = get_settings().LOCAL_CURRENCY
+        return "\n".join(
+            f"{account}: {self.valuation.account_value[i]:.2f}:{currency}"
+            f" ::: CHANGE: {self.valuation.account_change[i]:.2f}:{currency}"
+            for i, account in enumerate(self.valuation.accounts))
+
+    def on_prices_updated(self, message: PricesUpdated) -> None:
         """
         Refresh the displayed prices, actual values,
         and changes for all holdings.
 
-        Updates the UI elements for each symbol
-        with the latest data, converting
-        to local currency if necessary.
-        """
-        create_symbols()
-        for symbol in HOLDINGS.keys():
-            closing = self.query_one(f"#{Clean_symbol(symbol)}",
-                                     expect_type=Label)
-            actual = self.query_one(f"#{Clean_symbol(symbol)}actual",
-                                    expect_type=Label)
-            change = self.query_one(f"#{Clean_symbol(symbol)}change",
-                                    expect_type=Label)
-            closing.loading = True
-            change.loading = True
-            actual.loading = True
-            if self.stock_manager[symbol].currency == Settings().LOCAL_CURRENCY:
-                # Closing updated prices
-                closingprice = self.stock_manager[symbol].close.iloc[-1]
-                currencyclosing = self.stock_manager[symbol].currency
-                closing.update(f"Close: {closingprice:.2f}:{currencyclosing}")
-
-                # Actual updated prices
-                actualvalue = (self.stock_manager[symbol].close.iloc[-1]
-                               * self.stock_manager[symbol].quantity)
-                actual.update(f"Actual: {actualvalue:.2f}")
-
-                # Changed prices updated
-                purchased_value = (self.stock_manager[symbol].quantity
-                                   * self.stock_manager[symbol].value)
-                changedvalue = actualvalue - purchased_value
-                change.update(f"Changed: {changedvalue:.2f}")
-            elif self.stock_manager[symbol].currency != Settings().LOCAL_CURRENCY:
-                # Closing updated prices for converted currency
-                convertedlaststock = self.currency_convert.convert_to_local_currency(symbol)
-                closing.update(f"Close: {convertedlaststock:.2f}:{Settings().LOCAL_CURRENCY}")
-
-                # Actual updated prices for converted currency
-                actualvalue = (self.currency_convert.convert_to_local_currency(symbol)
-                               * self.stock_manager[symbol].quantity)
-                actual.update(f"Actual: {actualvalue:.2f}")
-
-                # Changed prices updated for converted currency
-                purchased_value = (self.stock_manager[symbol].quantity
-                                   * self.stock_manager[symbol].value)
-                changedvalue = actualvalue - purchased_value
-                change.update(f"Changed: {changedvalue:.2f}")
-
-            closing.loading = False
-            change.loading = False
-            actual.loading = False
+        Called after each fetch cycle of SymbolWatcher, which has
+        already refreshed the data and the valuation. Labels are looked
+        up in the index built by compose and only rewritten when their
+        text changed.
+        """
+        if len(self.labels) != len(self.valuation.symbols):
+            return  # Recompose pending after the holdings changed
+        with METRICS.timer("overview_update"):
+            # Only symbols whose local close moved need new label text
+            for i in message.changed:
+                closing, actual, change = self.labels[i]
+                self.write(closing, self.format_close(i))
+                self.write(actual, self.format_actual(i))
+                self.write(change, self.format_change(i))
+            self.write(self.total_label, self.format_total())
+            if self.account_label.display:
+                self.write(self.account_label, self.format_accounts())
 
 
 class TickerPriceDisplay(Digits):
     """
     Widget for displaying the current price of a specific ticker symbol.
 
-    Periodically updates to show the latest price for the given symbol.
+    Updates to show the latest price for the given symbol after each
+    fetch cycle.
     Used within SymbolTicker widgets to provide real-time price feedback.
 
     Args:
@@ -423,22 +342,16 @@ class TickerPriceDisplay(Digits):
         self.stock_manager = stock_manager  # Reference to StockManager
         self.symbol = symbol  # Symbol to display
 
-    async def on_mount(self) -> None:
-        """
-        Set up periodic price refresh when the widget is mounted.
-
-        Starts a timer to refresh the displayed price at the
-        interval specified by UPDATE_INTERVAL.
-        """
-        self.set_interval(Settings().UPDATE_INTERVAL, self.refresh_price)
-
-    async def refresh_price(self) -> None:
+    def on_prices_updated(self, message: PricesUpdated) -> None:
         """
         Refresh the displayed price for the ticker symbol.
 
-        Updates the widget with the latest closing price.
+        Updates the widget with the latest closing price when the
+        symbol changed in the last fetch cycle.
         """
-        price = self.stock_manager[self.symbol].close.iloc[-1]
+        if self.symbol not in message.symbols:
+            return
+        price = self.stock_manager[self.symbol].close[-1]
         self.update(f"{price:.2f}")
 
 
@@ -448,17 +361,40 @@ class SymbolTicker(Static):
     including price display and plot.
 
     Contains a remove button, a real-time price display, and a plot of
-    recent price history. Can be dynamically added or removed from the UI.
+    recent price history, either as a line or as candlesticks with a
+    volume plot below. SymbolList recycles tickers while scrolling by
+    handing them another symbol with show().
 
     Args:
         symbol (str): The symbol to display.
         stock_manager (StockManager): Reference to the stock manager.
+        overlays (bool): Draw the indicators over the price plot and
+        show the RSI.
+        candles (bool): Plot candlesticks and volume instead of a line.
     """
 
-    def __init__(self, symbol, stock_manager, *args, **kwargs):
+    class Removed(Message):
+        """
+        Posted when the remove button of a ticker is pressed.
+
+        Args:
+            symbol (str): The symbol to remove.
+        """
+
+        def __init__(self, symbol):
+            super().__init__()
+            self.symbol = symbol
+
+    def __init__(self, symbol, stock_manager, *args, overlays=False,
+                 candles=False, **kwargs):
         super().__init__(*args, **kwargs)
         self.symbol = symbol  # Symbol to display
         self.stock_manager = stock_manager  # Reference to StockManager
+        self.overlays = overlays  # Indicators drawn over the plot
+        self.candles = candles  # Candlesticks instead of a line
+        self.set_class(candles, "-candles")  # Shows the volume plot
+        self.series = None  # Indicator series while overlays are shown
+        self.series_key = None  # Bars and append count they were built at
 
     def compose(self) -> ComposeResult:
         """
@@ -470,33 +406,402 @@ class SymbolTicker(Static):
             yield Button(f"Remove Symbol {self.symbol}",
                          id="remove")  # Remove button
             yield TickerPriceDisplay(self.symbol,  # Price display
-                                     self.stock_manager,
-                                     id=f"{Clean_symbol(self.symbol)}")
+                                     self.stock_manager)
+            yield Label(id="rsi")  # RSI while overlays are shown
         yield PlotWidget(id="plot")  # Plot widget
+        yield PlotWidget(id="volume",  # Volume below the candlesticks
+                         allow_pan_and_zoom=False)
 
     def on_mount(self) -> None:
         """
-        Plot the symbol's historical data and update
-        the price display on mount.
+        Update the price display on mount.
+
+        The plot is drawn on the first resize, once the width of the
+        plot widget is known.
+        """
+        volume = self.query_one("#volume", PlotWidget)
+        volume.margin_top = 0  # Directly below the price plot
+        volume.margin_bottom = 0
+        self.fit_plots()
+        self.update_price()
+
+    def fit_plots(self) -> None:
+        """
+        Give the price plot the rows the volume plot does not need.
 
-        Initializes the plot with the symbol's
-        closing prices and updates the price display.
+        With candlesticks only the tick labels are kept below the price
+        plot, without them the default margin is restored.
+        """
+        self.query_one("#plot", PlotWidget).margin_bottom = (
+            1 if self.candles else PLOT_MARGIN_BOTTOM)
+
+    def on_resize(self) -> None:
+        """
+        Downsample the history again for the new plot width.
+        """
+        self.call_after_refresh(self.plot_history)
+
+    def on_prices_updated(self, message: PricesUpdated) -> None:
+        """
+        Append the new bars to the plot when the symbol changed.
+        """
+        if self.symbol in message.symbols:
+            with METRICS.timer("plot_update"):
+                self.append_bars()
+
+    def update_price(self) -> None:
+        """
+        Show the symbol's last closing price in the price display, and
+        its RSI when overlays are shown.
         """
-        plot = self.query_one(PlotWidget)
         symbol_data = self.stock_manager[self.symbol]
-        plot.plot(x=symbol_data.datetime,
-                  y=symbol_data.close,
+        sticker = self.query_one(TickerPriceDisplay)
+        sticker.update(f"{symbol_data.close[-1]:.2f}")
+        rsi = symbol_data.indicators.latest["rsi"]
+        if self.overlays and not np.isnan(rsi):
+            self.query_one("#rsi", Label).update(f"RSI {rsi:.0f}")
+        else:
+            self.query_one("#rsi", Label).update("")
+
+    def set_overlays(self, overlays) -> None:
+        """
+        Show or hide the indicators and redraw.
+
+        Args:
+            overlays (bool): Draw the indicators over the price plot.
+        """
+        if overlays == self.overlays:
+            return
+        self.overlays = overlays
+        if not overlays:  # Only kept while drawn
+            self.series = self.series_key = None
+        if self.is_mounted:
+            self.plot_history()
+
+    def set_candles(self, candles) -> None:
+        """
+        Switch between the line and the candlestick plot and redraw.
+
+        Args:
+            candles (bool): Plot candlesticks and volume.
+        """
+        if candles == self.candles:
+            return
+        self.candles = candles
+        self.set_class(candles, "-candles")
+        if self.is_mounted:
+            self.fit_plots()
+            self.query_one("#plot", PlotWidget).set_xlimits(None, None)
+            self.call_after_refresh(self.plot_history)  # After relayout
+
+    def show(self, symbol) -> None:
+        """
+        Reuse this ticker for another symbol.
+
+        Args:
+            symbol (str): The symbol to display from now on.
+        """
+        if symbol == self.symbol:
+            return
+        self.symbol = symbol
+        if not self.is_mounted:
+            return  # Composed with the new symbol on mount
+        self.query_one("#remove", Button).label = f"Remove Symbol {symbol}"
+        self.query_one(TickerPriceDisplay).symbol = symbol
+        self.plot_history()
+
+    def plot_history(self) -> None:
+        """
+        Replot the symbol's closing prices and update the price display.
+
+        The close series is reduced to the minimum and maximum of each
+        bucket, with about two buckets per braille pixel column, so the
+        number of plotted points depends on the plot width and not on
+        the number of bars. Buckets are kept so later bars can be
+        appended without reducing the whole series again.
+        """
+        if self.candles:
+            self.plot_candles()
+            return
+        plot = self.query_one("#plot", PlotWidget)
+        symbol_data = self.stock_manager[self.symbol]
+        bars = len(symbol_data.close)
+        self.buckets = max(1, 2 * plot.size.width)  # Braille is 2px wide
+        self.bucket_size = max(1, -(-bars // self.buckets))
+        self.buffer = symbol_data.bars  # A new buffer means new data
+        # Reduced complete buckets, x as running bar index
+        self.sampled_x = np.empty(0)
+        self.sampled_y = np.empty(0)
+        self.sampled_to = symbol_data.first_index  # End of those buckets
+        self.append_bars()
+
+    def append_bars(self) -> None:
+        """
+        Reduce only the bars after the complete buckets and redraw.
+
+        The bucket holding the last bar stays open, since the last bar
+        is still forming and gets replaced on refresh. Points of bars
+        evicted from the ring buffer are dropped from the front. If the
+        data was replaced, or the series outgrew its bucket size, the
+        whole history is reduced again.
+        """
+        if self.candles:
+            self.plot_candles()
+            return
+        symbol_data = self.stock_manager[self.symbol]
+        if not hasattr(self, "bucket_size"):
+            return  # Not plotted yet, the first resize will do that
+        bars = len(symbol_data.close)
+        first = symbol_data.first_index
+        if (symbol_data.bars is not self.buffer
+                or self.sampled_to < first
+                or bars > 2 * self.buckets * self.bucket_size):
+            self.plot_history()
+            return
+        evicted = self.sampled_x < first
+        if evicted.any():
+            self.sampled_x = self.sampled_x[~evicted]
+            self.sampled_y = self.sampled_y[~evicted]
+        x = np.arange(first, first + bars, dtype=float)
+        y = symbol_data.close.astype(float)
+        start = self.sampled_to - first
+        end = start + (bars - 1 - start) // self.bucket_size * self.bucket_size
+        if end > start:  # Buckets that no longer hold the last bar
+            complete_x, complete_y = downsample(x[start:end], y[start:end],
+                                                self.bucket_size)
+            self.sampled_x = np.append(self.sampled_x, complete_x)
+            self.sampled_y = np.append(self.sampled_y, complete_y)
+            self.sampled_to = first + end
+        open_x, open_y = downsample(x[end:], y[end:], self.bucket_size)
+        plot = self.query_one("#plot", PlotWidget)
+        plot.clear()
+        points = np.append(self.sampled_x, open_x) - first
+        plot.plot(x=points, y=np.append(self.sampled_y, open_y),
                   hires_mode=HiResMode.BRAILLE)
-        sticker = self.query_one(f"#{Clean_symbol(self.symbol)}")
-        sticker.update(f"{self.stock_manager[self.symbol].close.iloc[-1]:.2f}")
+        if self.overlays:
+            self.plot_overlays(points, points.astype(int))
+        self.update_price()
+
+    def plot_candles(self) -> None:
+        """
+        Redraw the bars as candlesticks with a volume plot below.
+
+        The bars are aggregated into one candle per column of the plot,
+        so the number of drawn candles depends on the plot width and not
+        on the number of bars. The wick spans the high and low, the body
+        the open and close, colored by direction like the volume bars.
+        """
+        plot = self.query_one("#plot", PlotWidget)
+        symbol_data = self.stock_manager[self.symbol]
+        # Columns between the axis lines, right of the tick labels
+        columns = plot.size.width - plot.margin_left - 2
+        size, offset, ends, open, high, low, close, volume = candles(
+            symbol_data.open.astype(float), symbol_data.high.astype(float),
+            symbol_data.low.astype(float), symbol_data.close.astype(float),
+            symbol_data.volume.astype(float), symbol_data.first_index,
+            columns)
+        # Candle centers in bar positions, one candle per plot column
+        x = offset + (np.arange(len(close)) + 0.5) * size
+        limits = (offset, offset + max(1, columns) * size)
+        rising = close >= open
+        no_width = np.full(len(x), np.nan)  # Vertical bars only
+        plot.clear()
+        plot.set_xlimits(*limits)
+        if self.overlays:  # Below the candles, which would be hidden
+            self.plot_overlays(x, ends)
+        plot.errorbar(x=x, y=(high + low) / 2, xerr=no_width,
+                      yerr=(high - low) / 2, marker="│",
+                      marker_style=CANDLE_WICK)
+        for direction, style in ((rising, CANDLE_RISING),
+                                 (~rising, CANDLE_FALLING)):
+            if direction.any():
+                plot.errorbar(x=x[direction],
+                              y=(open[direction] + close[direction]) / 2,
+                              xerr=no_width[direction],
+                              yerr=np.abs(close - open)[direction] / 2,
+                              marker="│", marker_style=style)
+        chart = self.query_one("#volume", PlotWidget)
+        chart.clear()
+        chart.set_xlimits(*limits)
+        chart.set_ylimits(0, None)
+        chart.bar(x=x, y=volume, width=size / 2,  # Within one column
+                  bar_style=[CANDLE_RISING if up else CANDLE_FALLING
+                             for up in rising],
+                  hires_mode=HiResMode.HALFBLOCK)
+        self.update_price()
+
+    def plot_overlays(self, x, index) -> None:
+        """
+        Draw the indicators over the price plot.
+
+        Bars without a value yet, e.g. before the first full window,
+        are skipped.
+
+        Args:
+            x (ndarray): Plot positions.
+            index (ndarray): Bar of each position.
+        """
+        plot = self.query_one("#plot", PlotWidget)
+        indicators = self.indicator_series()
+        for name, style in OVERLAY_STYLES.items():
+            values = indicators[name][index].astype(float)
+            valid = ~np.isnan(values)
+            if valid.any():
+                plot.plot(x=x[valid], y=values[valid], line_style=style,
+                          hires_mode=HiResMode.BRAILLE)
+
+    def indicator_series(self) -> dict:
+        """
+        Return the indicator series of the symbol's bars.
+
+        The series are only kept by tickers that draw them, and are
+        computed again when bars were added or replaced. A changed
+        forming bar only updates their last values, from the state the
+        IndicatorEngine keeps up to date.
+
+        Returns:
+            dict: Output name to an array aligned with the bars.
+        """
+        symbol_data = self.stock_manager[self.symbol]
+        key = (symbol_data.bars, symbol_data.bars.appended)
+        if self.series_key != key:
+            self.series = symbol_data.indicators.series(
+                symbol_data.bars.columns())
+            self.series_key = key
+        for name, value in symbol_data.indicators.latest.items():
+            if len(self.series[name]):
+                self.series[name][-1] = value
+        return self.series
 
     @on(Button.Pressed, "#remove")
     def remove_symbol(self) -> None:
         """
-        Remove this symbol widget from the UI
+        Remove this symbol from the ticker list
         when the remove button is pressed.
         """
-        self.remove()
+        self.post_message(self.Removed(self.symbol))
+
+
+class SymbolList(ScrollableContainer):
+    """
+    Virtualized, scrollable list of SymbolTickers.
+
+    Only the tickers in or near the viewport are mounted, and spacers
+    above and below them stand in for the rest, so the scrollbar covers
+    the whole list. Scrolling hands the mounted tickers other symbols
+    instead of mounting new widgets, so the DOM stays the same size for
+    any number of symbols.
+
+    Args:
+        stock_manager (StockManager): Reference to the stock manager.
+    """
+
+    def __init__(self, stock_manager, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stock_manager = stock_manager  # Reference to StockManager
+        self.symbols = []  # Added symbols in display order
+        self.tickers = []  # Mounted tickers, showing symbols from start
+        self.start = 0  # Index in symbols of the first mounted ticker
+        self.overlays = False  # Indicators drawn over the plots
+        self.candles = False  # Candlesticks instead of lines
+
+    def compose(self) -> ComposeResult:
+        yield Static(id="above", classes="spacer")
+        yield Static(id="below", classes="spacer")
+
+    def add(self, symbols) -> None:
+        """
+        Add symbols to the end of the list, skipping those already in it.
+
+        Args:
+            symbols (iterable): The symbols to add.
+        """
+        shown = set(self.symbols)
+        for symbol in symbols:
+            if symbol not in shown:
+                shown.add(symbol)
+                self.symbols.append(symbol)
+        self.update_window()
+
+    def sync(self) -> None:
+        """
+        Drop symbols that are no longer managed and replot the others.
+
+        Called after the holdings were reloaded with new data.
+        """
+        self.symbols = [symbol for symbol in self.symbols
+                        if symbol in self.stock_manager]
+        self.update_window()
+        for ticker in self.tickers:
+            if ticker.is_mounted:
+                ticker.plot_history()
+
+    def toggle_overlays(self) -> None:
+        """
+        Show or hide the indicators on every ticker.
+        """
+        self.overlays = not self.overlays
+        for ticker in self.tickers:
+            ticker.set_overlays(self.overlays)
+
+    def toggle_candles(self) -> None:
+        """
+        Switch every ticker between line and candlestick plots.
+        """
+        self.candles = not self.candles
+        for ticker in self.tickers:
+            ticker.set_candles(self.candles)
+
+    def on_symbol_ticker_removed(self, message: SymbolTicker.Removed) -> None:
+        """
+        Remove a symbol whose remove button was pressed.
+        """
+        if message.symbol in self.symbols:
+            self.symbols.remove(message.symbol)
+            self.update_window()
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        row = TICKER_ROW_HEIGHT
+        if int(old_value) // row != int(new_value) // row:  # Row scrolled
+            self.update_window()
+
+    def on_resize(self) -> None:
+        self.update_window()
+
+    def update_window(self) -> None:
+        """
+        Mount, recycle or remove tickers to cover the viewport.
+
+        Tickers are only created when the viewport grew and only removed
+        when it shrank or the list got shorter. Otherwise the mounted
+        tickers are given the symbols that scrolled into view.
+        """
+        if not self.is_mounted:
+            return
+        visible = self.size.height // TICKER_ROW_HEIGHT + 2
+        start = max(0, int(self.scroll_y) // TICKER_ROW_HEIGHT
+                    - TICKER_OVERSCAN)
+        end = min(len(self.symbols), start + visible + 2 * TICKER_OVERSCAN)
+        start = max(0, min(start, end - visible - 2 * TICKER_OVERSCAN))
+        count = end - start
+        if len(self.tickers) > count:  # Fewer rows to show
+            for ticker in self.tickers[count:]:
+                ticker.remove()
+            del self.tickers[count:]
+        for i, ticker in enumerate(self.tickers):
+            ticker.show(self.symbols[start + i])
+        if len(self.tickers) < count:  # More rows to show
+            new = [SymbolTicker(symbol, self.stock_manager,
+                                overlays=self.overlays,
+                                candles=self.candles)
+                   for symbol in self.symbols[start + len(self.tickers):end]]
+            self.tickers += new
+            self.mount_all(new, before="#below")
+        self.start = start
+        self.query_one("#above").styles.height = start * TICKER_ROW_HEIGHT
+        self.query_one("#below").styles.height = ((len(self.symbols) - end)
+                                                  * TICKER_ROW_HEIGHT)
 
 
 class SymbolWatcher(App):
@@ -514,6 +819,16 @@ class SymbolWatcher(App):
         CSS_PATH (str): Path to the CSS file for styling.
         BINDINGS (list): Key bindings for user actions.
         stock_manager (StockManager): The manager for all stock data.
+
+    Args:
+        holdings (dict): Mapping of "TICKER": [QUANTITY, VALUE] or to a
+        list of lots. Read from holdings.json when not given.
+        quote_source (QuoteSource): Overrides the QUOTE_SOURCE setting,
+        e.g. with a local stand-in feed.
+        replay (str): Directory of a recorded session to replay instead
+        of using the network.
+        replay_speed (float): How many times faster than real time the
+        recording is replayed.
     """
 
     TITLE = "Symbol Watcher 3"
@@ -523,17 +838,40 @@ class SymbolWatcher(App):
     BINDINGS = [
         ("a", "add_symbols", "Add Plots"),
         ("s", "toggle_overview", "Toggle Overview"),
+        ("i", "toggle_indicators", "Indicators"),
+        ("c", "toggle_candles", "Candles"),
+        ("r", "record_session", "Record"),
+        ("m", "toggle_metrics", "Metrics"),
         ("h", "toggle_help", "Help")
     ]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, holdings=None, quote_source=None, replay=None,
+                 replay_speed=1.0, **kwargs):
         super().__init__(*args, **kwargs)
-        self.stock_manager = StockManager()  # Create stock manager
+        if holdings is None:
+            holdings = load_holdings()
+        self.holdings = holdings  # "TICKER": [QUANTITY, VALUE] or lots
+        self.recording = None  # (symbols, rates) when replaying
+        if replay is not None:
+            bars, metadata, rates = load_recording(replay)
+            symbols, remaining = create_replay_symbols(bars, metadata,
+                                                       holdings)
+            self.recording = (symbols, rates)
+            quote_source = ReplayQuoteSource(remaining, replay_speed)
+            self.sub_title = f"{self.SUB_TITLE} - replay x{replay_speed:g}"
+        if quote_source is None:
+            quote_source = create_quote_source(get_settings().QUOTE_SOURCE)
+        # Create stock manager
+        self.stock_manager = StockManager(quote_source)
         # create currency converter
         self.currency_convert = CurrencyConvert(self.stock_manager)
-        symbols = create_symbols()  # Create symbol data objects
-        for symbol in symbols:
-            self.stock_manager.add_stock(symbol)  # Add to manager
+        self.valuation = PortfolioValuation(self.stock_manager,
+                                            self.currency_convert,
+                                            Lots(holdings))
+        self.fetching = False  # True while a worker is fetching data
+        self.refresh_timer = None  # Started once holdings are loaded
+        self.ticked = set()  # Symbols updated by the quote source
+        self.ticked_lock = threading.Lock()
 
     def compose(self) -> ComposeResult:
         """
@@ -544,17 +882,257 @@ class SymbolWatcher(App):
         """
         yield Header(show_clock=True)  # Header with clock
         yield PortfolioOverview(self.stock_manager,
-                                self.currency_convert,
+                                self.valuation,
                                 classes="-hidden")  # Portfolio overview
-        with ScrollableContainer(id="Symbols"):  # Container for symbol tickers
-            pass
+        yield SymbolList(self.stock_manager,
+                         id="Symbols")  # Container for symbol tickers
         yield Footer()  # Footer
 
     def on_mount(self):
         """
-        Set the application theme when the app is mounted.
+        Set the application theme when the app is mounted and start
+        loading the holdings in the background.
         """
         self.theme = "nord"
+        self.settings_watcher = FileWatcher(SETTINGS_FILE)
+        self.set_interval(SETTINGS_POLL, self.check_settings)
+        self.set_interval(1, self.update_status)
+        self.set_interval(TICK_FLUSH, self.flush_quotes)
+        self.set_interval(METRICS_LOG_INTERVAL, self.log_metrics)
+        self.fetching = True
+        self.load_symbols()
+
+    def report_failures(self, failures, action="load"):
+        """
+        Notify the user about symbols that could not be loaded.
+
+        Args:
+            failures (dict): Mapping of symbol to error message.
+            action (str): What failed, "load" or "refresh".
+        """
+        for symbol, error in failures.items():
+            self.notify(f"Could not {action} {symbol}: {error}",
+                        title=f"{action.capitalize()} failed",
+                        severity="error")
+
+    @work(thread=True, group="fetch")
+    def load_symbols(self, reload_history=True) -> None:
+        """
+        Load price history and exchange rates off the event loop.
+
+        Args:
+            reload_history (bool): Rebuild every SymbolData. When False
+            only the exchange rates are refetched.
+        """
+        failures = {}
+        if self.recording is not None:  # Replay, no network access
+            symbols, rates = self.recording
+            self.stock_manager.replace(symbols)
+            self.currency_convert.rates = dict(rates)
+        else:
+            if reload_history:
+                # Create symbol data objects, collecting failed symbols
+                symbols, failures = create_symbols(self.holdings)
+                self.stock_manager.replace(symbols)
+            self.currency_convert.start()  # Load and keep refreshing FX
+        self.call_from_thread(self.symbols_loaded, failures)
+
+    def symbols_loaded(self, failures) -> None:
+        """
+        Show freshly loaded holdings once the loading worker is done.
+
+        Args:
+            failures (dict): Mapping of symbol to error message.
+        """
+        self.fetching = False
+        self.report_failures(failures)
+        self.valuation.update()
+        self.query_one(PortfolioOverview).refresh(recompose=True)
+        self.query_one(SymbolList).sync()
+        if self.refresh_timer is None:  # First load
+            self.refresh_timer = self.set_interval(PollScheduler.tick(),
+                                                   self.refresh_prices)
+            # Started once, a running source keeps going across reloads
+            self.stock_manager.source.start(self.stock_manager,
+                                            self.quotes_received)
+        self.update_status()
+
+    def quotes_received(self, symbols) -> None:
+        """
+        Collect symbols updated by a push quote source.
+
+        Called from the source's thread. The symbols are shown by the
+        next flush_quotes, so bursts of quotes become one UI update.
+
+        Args:
+            symbols (set): Symbols whose data changed.
+        """
+        with self.ticked_lock:
+            self.ticked.update(symbols)
+
+    def flush_quotes(self) -> None:
+        """
+        Show the symbols pushed by the quote source since the last flush.
+        """
+        if not self.ticked:
+            return
+        with self.ticked_lock:
+            symbols, self.ticked = self.ticked, set()
+        self.prices_fetched(symbols, polled=False)
+
+    def refresh_prices(self) -> None:
+        """
+        Start one fetch cycle unless the previous one is still running.
+
+        This single timer replaces one timer per widget. It runs at the
+        shortest poll interval, the quote source decides which symbols
+        are due.
+        """
+        if self.fetching:
+            return
+        self.fetching = True
+        self.update_status()
+        self.fetch_prices()
+
+    @work(thread=True, group="fetch")
+    def fetch_prices(self) -> None:
+        """
+        Refresh the price history in a worker thread.
+
+        The widgets keep showing the previous values until
+        prices_fetched runs on the event loop. Failures are reported
+        and logged, and the next cycle retries.
+        """
+        updated, failures = [], {}
+        try:
+            with METRICS.timer("fetch_cycle"):
+                updated, failures = self.stock_manager.poll()
+        except Exception as error:  # Keep the shown prices
+            logger.exception("Fetch cycle failed")
+            failures = {"prices": str(error) or type(error).__name__}
+        for symbol, error in failures.items():
+            logger.warning("Could not refresh %s: %s", symbol, error)
+        self.call_from_thread(self.report_failures, failures, "refresh")
+        self.call_from_thread(self.prices_fetched, updated)
+
+    def prices_fetched(self, updated, polled=True) -> None:
+        """
+        Tell the price widgets what changed in the last fetch cycle.
+
+        The valuation is updated once, then the PortfolioOverview, if
+        any local value moved, and the TickerPriceDisplay and
+        SymbolTicker of each changed symbol receive a PricesUpdated
+        message and only re-render. Quiet symbols are not touched.
+
+        Args:
+            updated (list): Symbols whose data changed.
+            polled (bool): False for quotes pushed between fetch cycles.
+        """
+        if polled:
+            self.fetching = False
+        self.valuation.update()
+        message_symbols = frozenset(updated)
+        if len(self.valuation.changed):
+            self.query_one(PortfolioOverview).post_message(
+                PricesUpdated(message_symbols, self.valuation.changed))
+        if message_symbols:
+            for widget in self.query("TickerPriceDisplay, SymbolTicker"):
+                if widget.symbol in message_symbols:
+                    widget.post_message(PricesUpdated(message_symbols))
+        self.update_status()
+
+    def update_status(self) -> None:
+        """
+        Show the age of the displayed prices in the overview.
+
+        The age is that of the least recently updated symbol whose
+        market is not closed, or of any symbol when all are closed.
+        Symbols whose last successful fetch is older than two poll
+        intervals of their market phase are counted as stale. Symbols
+        of closed markets are counted as closed instead.
+        """
+        stocks = self.stock_manager.stocks.values()
+        if not stocks:
+            text = ("Loading holdings..." if self.fetching
+                    else "No holdings loaded")
+        else:
+            now = time.time()
+            ages = [now - stock.fetched for stock in stocks]
+            phases = [market_phase(stock.exchange, stock.timezone, now)
+                      for stock in stocks]
+            oldest = max((age for age, phase in zip(ages, phases)
+                          if phase != "closed"), default=max(ages))
+            text = f"Prices updated {oldest:.0f}s ago"
+            stale_after = 2 * get_settings().UPDATE_INTERVAL
+            stale = sum(age > stale_after * POLL_FACTORS[phase]
+                        for age, phase in zip(ages, phases)
+                        if phase != "closed")
+            closed = phases.count("closed")
+            if stale:
+                text += f" - {stale} stale"
+            if closed:
+                text += f" - {closed} closed"
+            if self.fetching:
+                text += " - refreshing..."
+        self.query_one(PortfolioOverview).update_status(text)
+
+    def check_settings(self) -> None:
+        """
+        Reload settings.json when it has been modified.
+
+        Invalid JSON, e.g. a half-saved file, keeps the current settings.
+        """
+        if not self.settings_watcher.changed():
+            return
+        try:
+            previous, settings = reload_settings()
+        except ValueError as error:
+            self.notify(f"Keeping current settings: {error}",
+                        title="Invalid settings.json", severity="error")
+            return
+        changed = previous.changed(settings)
+        if changed:
+            self.apply_settings(changed, settings)
+
+    def apply_settings(self, changed, settings) -> None:
+        """
+        Rebuild only the parts of the app affected by changed settings.
+
+        PERIOD and INTERVAL reload the price history, LOCAL_CURRENCY
+        refetches the exchange rates, both in a background worker,
+        QUOTE_SOURCE swaps the quote source (except during a replay) and
+        UPDATE_INTERVAL restarts the refresh timer.
+
+        Args:
+            changed (set): Names of the settings that changed.
+            settings (Settings): The new settings.
+        """
+        if changed & {"PERIOD", "INTERVAL", "LOCAL_CURRENCY"}:
+            self.fetching = True
+            self.load_symbols(
+                reload_history=bool(changed & {"PERIOD", "INTERVAL"}))
+        if "QUOTE_SOURCE" in changed and self.recording is None:
+            self.stock_manager.source.stop()
+            self.stock_manager.source = create_quote_source(
+                settings.QUOTE_SOURCE)
+            if self.refresh_timer is not None:  # Holdings are loaded
+                self.stock_manager.source.start(self.stock_manager,
+                                                self.quotes_received)
+        if "UPDATE_INTERVAL" in changed and self.refresh_timer is not None:
+            self.refresh_timer.stop()
+            self.refresh_timer = self.set_interval(PollScheduler.tick(),
+                                                   self.refresh_prices)
+        self.notify(f"Applied {', '.join(sorted(changed))}",
+                    title="Settings reloaded")
+
+    def on_unmount(self) -> None:
+        """
+        Stop the background exchange rate refresh and quote source, and
+        log the final metrics.
+        """
+        self.currency_convert.stop()
+        self.stock_manager.source.stop()
+        self.log_metrics()
 
     def action_toggle_overview(self) -> None:
         """
@@ -566,15 +1144,46 @@ class SymbolWatcher(App):
         """
         Add symbol ticker widgets to the UI for each holding.
 
-        Dynamically mounts a SymbolTicker for each symbol in the stock manager.
+        Adds every symbol in the stock manager to the SymbolList, which
+        only mounts tickers for the symbols in view. Symbols that are
+        already listed are not added again.
+        """
+        self.query_one(SymbolList).add(self.stock_manager.stocks)
+
+    def action_toggle_indicators(self) -> None:
+        """
+        Toggle the SMA, EMA, VWAP and Bollinger band overlays and RSI.
         """
-        print("Creating Symbols with plots n stuff")
-        for symbol in self.stock_manager.stocks:
-            symbolticker = SymbolTicker(self.stock_manager[symbol].symbol,
-                                        self.stock_manager)
-            container = self.query_one("#Symbols")
-            container.mount(symbolticker)
-            symbolticker.scroll_visible()
+        self.query_one(SymbolList).toggle_overlays()
+
+    def action_toggle_candles(self) -> None:
+        """
+        Toggle between line plots and candlesticks with volume.
+        """
+        self.query_one(SymbolList).toggle_candles()
+
+    def action_record_session(self) -> None:
+        """
+        Save the current bars, metadata and exchange rates for replay.
+        """
+        directory = os.path.join(RECORDINGS_DIR,
+                                 time.strftime("%Y-%m-%d_%H%M%S"))
+        record_session(self.stock_manager, self.currency_convert, directory)
+        self.notify(f"Replay with: python App.py --replay {directory}",
+                    title="Session recorded")
+
+    def action_toggle_metrics(self) -> None:
+        """
+        Display the metrics screen as a modal overlay.
+        """
+        self.push_screen(MetricsScreen())
+
+    def log_metrics(self) -> None:
+        """
+        Write the current metrics to the log, one line per stage.
+        """
+        for line in METRICS.lines():
+            logger.info(line)
 
     def action_toggle_help(self):
         """
@@ -592,5 +1201,14 @@ if __name__ == "__main__":
     else:
         print(f" Loaded holdings.json succesfully \n {HOLDINGS}")
 
+    # Replay a recorded session: --replay DIRECTORY [--speed MULTIPLIER]
+    args = sys.argv[1:]
+    replay = args[args.index("--replay") + 1] if "--replay" in args else None
+    speed = float(args[args.index("--speed") + 1]) if "--speed" in args else 1
+
+    # Log metrics to a file, the terminal belongs to the app
+    logging.basicConfig(filename=METRICS_LOG, level=logging.INFO,
+                        format="%(asctime)s %(message)s")
+
     # Run the app
-    SymbolWatcher().run()
+    SymbolWatcher(holdings=HOLDINGS, replay=replay, replay_speed=speed).run()
@@ -0,0 +1,3012 @@
+"""
+Data and valuation pipeline of Symbol Watcher 3.
+
+Everything here runs without Textual: settings, holdings, the price
+history and metadata caches, StockManager with its quote sources,
+CurrencyConvert, PortfolioValuation and SymbolData. App.py builds the
+terminal UI on top of it and Daemon.py runs it headless.
+"""
+# Import necessary libraries
+import os
+import time
+import json
+import random  # For backoff jitter
+import logging  # For the periodic metrics log
+import sqlite3  # For the on-disk price history cache
+import threading
+from collections import deque  # Sliding windows of the indicators
+from contextlib import contextmanager
+from datetime import datetime  # For exchange local time
+from zoneinfo import ZoneInfo  # For exchange timezones
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import numpy as np  # For vectorized portfolio valuation
+import pandas as pd  # For merging price history
+import yfinance as yf  # For fetching financial data
+from curl_cffi import requests as curl_requests  # HTTP client of yfinance
+
+
+MAX_FETCH_WORKERS = 16  # Upper bound on concurrent Yahoo Finance requests
+FETCH_RATE = 10  # Sustained Yahoo Finance requests per second
+FETCH_BURST = 20  # Requests allowed at once before FETCH_RATE applies
+FETCH_RETRIES = 4  # Retries of a rate limited or failed request
+FETCH_BACKOFF = 1  # Seconds before the first retry, doubled each time
+FETCH_BACKOFF_MAX = 30  # Upper bound on the wait between retries
+
+FX_BASE = "USD"  # Every exchange rate is fetched against this currency
+FX_REFRESH = 60  # Seconds between background exchange rate refreshes
+
+STREAM_RETRY = 5  # Seconds before reconnecting a dropped quote stream
+
+RECORDINGS_DIR = "recordings"  # Where recorded sessions are written
+
+METRICS_LOG = "metrics.log"  # Written by the app when run directly
+METRICS_LOG_INTERVAL = 60  # Seconds between metrics log lines
+
+DEFAULT_ACCOUNT = "default"  # Account of holdings given as [QUANTITY, VALUE]
+
+SETTINGS_FILE = "settings.json"  # Watched for changes while running
+SETTINGS_POLL = 2  # Seconds between checks of the settings file
+
+CACHE_FILE = "history_cache.sqlite"  # On-disk OHLCV store
+CACHE_MAX_ROWS = 2_000_000  # Size limit for all cached bars together
+DAY = 24 * 60 * 60  # Seconds per day
+# How long bars of each interval are kept in the cache, in seconds.
+# Intraday limits follow how far back Yahoo serves each interval.
+CACHE_EXPIRY = {
+    "1m": 7 * DAY, "2m": 60 * DAY, "5m": 60 * DAY, "15m": 60 * DAY,
+    "30m": 60 * DAY, "60m": 730 * DAY, "90m": 60 * DAY, "1h": 730 * DAY,
+    "1d": 10 * 365 * DAY, "5d": 10 * 365 * DAY, "1wk": 10 * 365 * DAY,
+    "1mo": 10 * 365 * DAY, "3mo": 10 * 365 * DAY,
+}
+METADATA_FILE = "metadata.json"  # On-disk symbol metadata store
+METADATA_TTL = DAY  # Refetch metadata of a symbol once per day
+# Minor currency units Yahoo quotes some exchanges in, e.g. pence on
+# the LSE: "GBp" prices are 1/100 of a "GBP".
+MINOR_UNITS = {"GBp": ("GBP", 100), "GBX": ("GBP", 100),
+               "ZAc": ("ZAR", 100), "ILA": ("ILS", 100)}
+# Length of each INTERVAL, in seconds
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600,
+    "90m": 5400, "1h": 3600, "1d": DAY, "5d": 5 * DAY, "1wk": 7 * DAY,
+    "1mo": 31 * DAY, "3mo": 92 * DAY,
+}
+MAX_HISTORY_BARS = 100_000  # Ring buffer capacity when PERIOD is "max"
+RING_SLACK = 0.25  # Spare ring buffer slots, as a share of the bars held
+RING_SLACK_MIN = 64  # Fewest spare slots after a ring buffer compaction
+INDICATOR_PERIOD = 20  # Bars in the SMA, EMA and Bollinger band windows
+BOLLINGER_WIDTH = 2  # Standard deviations between Bollinger bands and SMA
+RSI_PERIOD = 14  # Smoothing period of the RSI
+# Approximate length of each PERIOD, in seconds. "max" has no limit.
+PERIOD_SECONDS = {
+    "1d": DAY, "5d": 5 * DAY, "1mo": 31 * DAY, "3mo": 92 * DAY,
+    "6mo": 183 * DAY, "1y": 366 * DAY, "2y": 731 * DAY, "5y": 1827 * DAY,
+    "10y": 3653 * DAY, "ytd": 366 * DAY,
+}
+HOUR = 60  # Minutes per hour, for the trading hours below
+US_HOURS = (4 * HOUR, 9 * HOUR + 30, 16 * HOUR, 20 * HOUR)
+# Trading hours in exchange local minutes after midnight by Yahoo
+# exchangeName: pre-market start, open, close and post-market end.
+# Exchanges without extended hours get half an hour after the close
+# for closing auction prints. Unknown exchanges are always polled.
+EXCHANGE_HOURS = {
+    "NMS": US_HOURS, "NGM": US_HOURS, "NCM": US_HOURS, "NYQ": US_HOURS,
+    "ASE": US_HOURS, "PCX": US_HOURS, "BTS": US_HOURS, "PNK": US_HOURS,
+    "SNP": US_HOURS, "DJI": US_HOURS, "NIM": US_HOURS,
+    "STO": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "HEL": (10 * HOUR, 10 * HOUR, 18 * HOUR + 30, 19 * HOUR),
+    "CPH": (9 * HOUR, 9 * HOUR, 17 * HOUR, 17 * HOUR + 30),
+    "OSL": (9 * HOUR, 9 * HOUR, 16 * HOUR + 20, 16 * HOUR + 50),
+    "LSE": (8 * HOUR, 8 * HOUR, 16 * HOUR + 30, 17 * HOUR),
+    "GER": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "FRA": (8 * HOUR, 8 * HOUR, 22 * HOUR, 22 * HOUR + 30),
+    "PAR": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "AMS": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "MIL": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "MCE": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "EBS": (9 * HOUR, 9 * HOUR, 17 * HOUR + 30, 18 * HOUR),
+    "TOR": (9 * HOUR + 30, 9 * HOUR + 30, 16 * HOUR, 16 * HOUR + 30),
+    "JPX": (9 * HOUR, 9 * HOUR, 15 * HOUR + 30, 16 * HOUR),
+    "HKG": (9 * HOUR + 30, 9 * HOUR + 30, 16 * HOUR, 16 * HOUR + 30),
+    "ASX": (10 * HOUR, 10 * HOUR, 16 * HOUR, 16 * HOUR + 30),
+    "CCY": (0, 0, 24 * HOUR, 24 * HOUR),  # Currencies, on weekdays
+}
+ALWAYS_OPEN = {"CCC"}  # Cryptocurrencies trade every day
+# Poll interval per market phase, as a multiple of UPDATE_INTERVAL.
+# Closed markets are not polled, "active" is an open market whose price
+# moved at least ACTIVE_MOVE since its previous poll.
+POLL_FACTORS = {"active": 0.5, "open": 1, "pre": 5, "post": 5}
+ACTIVE_MOVE = 0.002  # Relative price move that makes a symbol active
+
+
+class Settings:
+    """
+    Loads and stores application settings from
+    a JSON file. Provides attributes for PERIOD,
+    INTERVAL, UPDATE_INTERVAL, LOCAL_CURRENCY and QUOTE_SOURCE.
+
+    Instances are read-only. The application shares a single instance
+    through get_settings(), which reload_settings() swaps out when the
+    file changes.
+    """
+    __slots__ = ("PERIOD", "INTERVAL", "UPDATE_INTERVAL", "LOCAL_CURRENCY",
+                 "QUOTE_SOURCE")
+    DEFAULTS = {"QUOTE_SOURCE": "poll"}  # For settings that may be left out
+
+    def __init__(self, filename=SETTINGS_FILE):
+        settings = load_settings(filename)
+        for name in self.__slots__:
+            object.__setattr__(self, name,
+                               settings.get(name, self.DEFAULTS.get(name)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are read-only, edit settings.json")
+
+    def changed(self, other):
+        """
+        Compare against another Settings instance.
+
+        Args:
+            other (Settings): The settings to compare with.
+
+        Returns:
+            set: Names of the settings whose values differ.
+        """
+        return {name for name in self.__slots__
+                if getattr(self, name) != getattr(other, name)}
+
+
+_settings = None  # The shared Settings instance
+
+
+def get_settings():
+    """
+    Return the shared settings, loading them on first use.
+
+    Returns:
+        Settings: The current application settings.
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def reload_settings():
+    """
+    Re-read the settings file and replace the shared settings.
+
+    Raises:
+        ValueError: If the file does not contain valid JSON, in which
+        case the current settings are kept.
+
+    Returns:
+        tuple: The previous and the new Settings instances.
+    """
+    global _settings
+    previous = get_settings()
+    _settings = Settings()
+    return previous, _settings
+
+
+class FileWatcher:
+    """
+    Detects changes to a file by polling its modification time.
+
+    Args:
+        filename (str): Path to the file to watch.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.mtime = self.stat()
+
+    def stat(self):
+        """
+        Return the file's modification time, or None if it is missing.
+        """
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def changed(self):
+        """
+        Check whether the file changed since the previous check.
+
+        Returns:
+            bool: True if the modification time differs.
+        """
+        mtime = self.stat()
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        return True
+
+
+# For dictionary of holdings: "TICKER": [QUANTITY, VALUE IN LOCAL CURRENCY]
+def load_holdings(filename="holdings.json"):
+    """
+    Load holdings data from a JSON file.
+
+    Attempts to open and parse the specified JSON
+    file containing the user's stock holdings.
+    Each holding should be structured as
+    "TICKER": [QUANTITY, VALUE IN LOCAL CURRENCY], or as a list of tax
+    lots, see Lots.
+    If the file does not exist, returns an empty
+    dictionary.
+
+    Args:
+        filename (str): The path to the JSON file containing holdings data.
+
+    Returns:
+        dict: A dictionary mapping ticker symbols to their quantity and
+        value, or to their lots.
+    """
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class Lots:
+    """
+    Tax lots of the holdings in columnar arrays.
+
+    Each lot has an account, a quantity, a cost in local currency and a
+    purchase date. A holding is either a list of lots:
+
+        "TICKER": [{"account": "ISK", "quantity": 10, "cost": 5500,
+                    "date": "2024-03-01"}, ...]
+
+    or the [QUANTITY, VALUE] pair, which becomes one lot in
+    DEFAULT_ACCOUNT costing QUANTITY * VALUE. Lots refer to their symbol
+    and account by index, so totals per symbol or account are grouped
+    sums over the arrays rather than loops over the lots.
+
+    Args:
+        holdings (dict): Mapping of "TICKER" to [QUANTITY, VALUE] or to
+        a list of lots.
+
+    Attributes:
+        symbols (list): Symbols in holdings order.
+        accounts (list): Accounts in order of first appearance.
+        symbol_index (ndarray): Index into symbols per lot.
+        account_index (ndarray): Index into accounts per lot.
+        quantity (ndarray): Shares per lot.
+        cost (ndarray): Purchase cost per lot in local currency.
+        date (ndarray): Purchase date per lot, NaT when not given.
+    """
+
+    def __init__(self, holdings):
+        self.symbols = list(holdings)
+        accounts = {}  # {account: index}
+        symbol_index, account_index = [], []
+        quantity, cost, date = [], [], []
+        for i, lots in enumerate(holdings.values()):
+            if lots and not isinstance(lots[0], dict):  # [QUANTITY, VALUE]
+                lots = [{"quantity": lots[0], "cost": lots[0] * lots[1]}]
+            for lot in lots:
+                account = lot.get("account", DEFAULT_ACCOUNT)
+                symbol_index.append(i)
+                account_index.append(accounts.setdefault(account,
+                                                         len(accounts)))
+                quantity.append(lot.get("quantity", 0))
+                cost.append(lot.get("cost", 0))
+                date.append(lot.get("date"))
+        self.accounts = list(accounts)
+        self.symbol_index = np.array(symbol_index, dtype=np.intp)
+        self.account_index = np.array(account_index, dtype=np.intp)
+        self.quantity = np.array(quantity, dtype=float)
+        self.cost = np.array(cost, dtype=float)
+        self.date = np.array(date, dtype="datetime64[D]")
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def by_symbol(self, values):
+        """
+        Sum a value per lot into one total per symbol.
+
+        Args:
+            values (ndarray): One value per lot.
+
+        Returns:
+            ndarray: One total per symbol, in symbols order.
+        """
+        return np.bincount(self.symbol_index, weights=values,
+                           minlength=len(self.symbols))
+
+    def by_account(self, values):
+        """
+        Sum a value per lot into one total per account.
+
+        Args:
+            values (ndarray): One value per lot.
+
+        Returns:
+            ndarray: One total per account, in accounts order.
+        """
+        return np.bincount(self.account_index, weights=values,
+                           minlength=len(self.accounts))
+
+    def positions(self):
+        """
+        Return the combined position of each symbol over all lots.
+
+        Returns:
+            dict: Mapping of "TICKER": [QUANTITY, VALUE], where VALUE is
+            the average cost per share.
+        """
+        quantity = self.by_symbol(self.quantity)
+        cost = self.by_symbol(self.cost)
+        value = np.divide(cost, quantity, out=np.zeros_like(cost),
+                          where=quantity != 0)
+        return {symbol: [float(quantity[i]), float(value[i])]
+                for i, symbol in enumerate(self.symbols)}
+
+
+def load_settings(filename="settings.json"):
+    """
+    Load application settings
+    from a JSON file.
+
+    Reads the specified JSON file to load
+    user-configurable settings such as
+    PERIOD, INTERVAL, and UPDATE_INTERVAL.
+    These settings control the timespan of data
+    to fetch, the data granularity, and
+    how often prices are updated.
+    If the file does not exist,
+    returns an empty dictionary.
+
+
+    Args:
+        filename (str): The path to the JSON
+        file containing application settings.
+
+    Returns:
+        dict: A dictionary containing settings for
+        PERIOD, INTERVAL, LOCAL_CURRENCY, and UPDATE_INTERVAL.
+    """
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def history_capacity(period, interval):
+    """
+    Return how many bars of an interval fit in a period.
+
+    Args:
+        period (str): A yfinance period string such as "5d".
+        interval (str): A yfinance interval string such as "1m".
+
+    Returns:
+        int: The number of bars, at most MAX_HISTORY_BARS.
+    """
+    seconds = PERIOD_SECONDS.get(period)
+    if seconds is None:  # "max"
+        return MAX_HISTORY_BARS
+    bars = -(-seconds // INTERVAL_SECONDS.get(interval, 60)) + 1
+    return min(bars, MAX_HISTORY_BARS)
+
+
+class Metrics:
+    """
+    Thread-safe timing counters for the stages of a fetch cycle.
+
+    Stages are timed with `with METRICS.timer("stage"):` and keep their
+    count, total, last and maximum duration. Counters count events such
+    as network calls and downloaded bytes. Fetch latency is also kept
+    per symbol, so a slow cycle can be traced to the symbols behind it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()  # Updated from worker threads
+        self.stages = {}  # {stage: [count, total, last, max]} in seconds
+        self.counters = {}  # {name: count}
+        self.latency = {}  # {symbol: last fetch duration} in seconds
+
+    @contextmanager
+    def timer(self, stage, symbol=None):
+        """
+        Time the enclosed block as one run of a stage.
+
+        Args:
+            stage (str): The stage name, e.g. "fetch".
+            symbol (str): Also record the duration as the latency of
+            this symbol.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, symbol)
+
+    def record(self, stage, seconds, symbol=None):
+        """
+        Add one run of a stage.
+
+        Args:
+            stage (str): The stage name.
+            seconds (float): How long the run took.
+            symbol (str): The symbol the run was for, if any.
+        """
+        with self.lock:
+            stats = self.stages.setdefault(stage, [0, 0.0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = seconds
+            stats[3] = max(stats[3], seconds)
+            if symbol is not None:
+                self.latency[symbol] = seconds
+
+    def count(self, name, amount=1):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The counter name, e.g. "network_calls".
+            amount (int): How much to add.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def hit_ratio(self, name):
+        """
+        Return the hit ratio of a "<name>_hits"/"<name>_misses" pair.
+
+        Args:
+            name (str): The counter prefix, e.g. "fx".
+
+        Returns:
+            float: Hits divided by lookups, or NaN before any lookup.
+        """
+        with self.lock:
+            hits = self.counters.get(f"{name}_hits", 0)
+            misses = self.counters.get(f"{name}_misses", 0)
+        return hits / (hits + misses) if hits + misses else float("nan")
+
+    def lines(self, slowest=5):
+        """
+        Format every stage and counter for display.
+
+        Args:
+            slowest (int): How many of the slowest symbols to list.
+
+        Returns:
+            list: One line of text per stage, counter and slow symbol.
+        """
+        with self.lock:
+            stages = {stage: list(stats)
+                      for stage, stats in self.stages.items()}
+            counters = dict(self.counters)
+            latency = sorted(self.latency.items(),
+                             key=lambda item: item[1], reverse=True)
+        lines = [f"{stage}: {count} runs, mean {total / count * 1000:.1f} ms,"
+                 f" last {last * 1000:.1f} ms, max {peak * 1000:.1f} ms"
+                 for stage, (count, total, last, peak)
+                 in sorted(stages.items())]
+        lines += [f"{name}: {value}" for name, value
+                  in sorted(counters.items())]
+        lines.append(f"fx_hit_ratio: {self.hit_ratio('fx'):.1%}")
+        lines += [f"slowest fetch {symbol}: {seconds * 1000:.1f} ms"
+                  for symbol, seconds in latency[:slowest]]
+        return lines
+
+
+METRICS = Metrics()  # Shared by every instrumented stage
+logger = logging.getLogger("SymbolWatcher")
+
+
+class MeteredSession(curl_requests.Session):
+    """
+    HTTP session that counts yfinance requests and downloaded bytes.
+
+    Passed to every yfinance call, so METRICS sees all network traffic.
+    Server errors are raised, since yfinance would otherwise parse the
+    error page as an empty result that FetchGateway cannot retry.
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        METRICS.count("network_calls")
+        METRICS.count("bytes_downloaded", len(response.content))
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+
+
+SESSION = MeteredSession(impersonate="chrome")  # Shared by yfinance calls
+# Let request failures reach FetchGateway instead of yfinance logging them
+# and returning an empty result
+yf.config.debug.hide_exceptions = False
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared by threads.
+
+    Holds up to burst tokens and refills rate tokens per second. Each
+    request takes one token, waiting for a refill when none are left.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (int): Maximum number of stored tokens.
+    """
+
+    def __init__(self, rate=FETCH_RATE, burst=FETCH_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens
+                                  + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            METRICS.count("fetch_throttled")
+            time.sleep(wait)
+
+
+def is_transient(error):
+    """
+    Return whether a failed request is worth retrying.
+
+    Args:
+        error (Exception): The error raised by the request.
+
+    Returns:
+        bool: True for rate limits, server errors and connection
+        problems, False for errors a retry will not fix.
+    """
+    if isinstance(error, yf.exceptions.YFRateLimitError):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status:  # curl reports 0 when no response arrived
+        return status == 429 or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError,
+                              curl_requests.exceptions.RequestException))
+
+
+class MissingTickersError(ConnectionError):
+    """
+    Raised when a batched download returned no data for some tickers.
+
+    yf.download catches the failure of each ticker, e.g. a rate limit,
+    and returns no data for it instead of raising, so the gateway raises
+    this to retry them.
+
+    Args:
+        missing (list): The tickers without data.
+        history (DataFrame): The data of the other tickers.
+    """
+
+    def __init__(self, missing, history):
+        super().__init__(f"No data returned for {', '.join(missing)}")
+        self.missing = missing
+        self.history = history
+
+
+class FetchGateway:
+    """
+    Single entry point for every Yahoo Finance request.
+
+    All requests share SESSION and its connection pool, and pass a
+    token bucket so large watchlists stay under Yahoo's rate limit.
+    Identical requests made while one is in flight wait for its result
+    instead of being sent again. Rate limits, server errors and dropped
+    connections are retried with exponential backoff and jitter.
+
+    Args:
+        rate (float): Sustained requests per second.
+        burst (int): Requests allowed at once.
+        retries (int): Retries of a transient failure.
+        backoff (float): Seconds before the first retry.
+        session (Session): HTTP session shared by the requests.
+    """
+
+    def __init__(self, rate=FETCH_RATE, burst=FETCH_BURST,
+                 retries=FETCH_RETRIES, backoff=FETCH_BACKOFF,
+                 session=SESSION):
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.session = session
+        self.lock = threading.Lock()
+        self.tickers = {}  # {symbol: Ticker}, reused across requests
+        self.in_flight = {}  # {request key: Future}
+
+    def ticker(self, symbol):
+        """
+        Return the shared yfinance ticker of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            Ticker: The ticker, created on first use.
+        """
+        with self.lock:
+            ticker = self.tickers.get(symbol)
+            if ticker is None:
+                ticker = yf.Ticker(symbol, session=self.session)
+                self.tickers[symbol] = ticker
+        return ticker
+
+    def history(self, symbol, **kwargs):
+        """
+        Fetch the price history of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+            **kwargs: Arguments of Ticker.history, e.g. start, interval.
+
+        Returns:
+            DataFrame: The bars indexed by time, empty if there are none
+            in the requested range.
+        """
+        ticker = self.ticker(symbol)
+        return self.call(("history", symbol, tuple(sorted(kwargs.items()))),
+                         lambda: self.bars(ticker, kwargs))
+
+    @staticmethod
+    def bars(ticker, kwargs):
+        """
+        Call Ticker.history, returning no bars rather than raising for them.
+
+        yfinance raises for every failure once exceptions are not hidden,
+        including a range without bars, e.g. a refresh of a closed market.
+
+        Args:
+            ticker (Ticker): The yfinance ticker.
+            kwargs (dict): Arguments of Ticker.history.
+
+        Returns:
+            DataFrame: The bars indexed by time.
+        """
+        try:
+            return ticker.history(**kwargs)
+        except yf.exceptions.YFPricesMissingError:  # No bars in the range
+            return pd.DataFrame(
+                columns=["Open", "High", "Low", "Close", "Volume"],
+                index=pd.DatetimeIndex([], tz="UTC"))
+
+    def info(self, symbol):
+        """
+        Fetch the info dictionary of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            dict: The info payload.
+        """
+        ticker = self.ticker(symbol)
+        return self.call(("info", symbol), lambda: ticker.info)
+
+    def metadata(self, symbol):
+        """
+        Fetch the history metadata of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            dict: The metadata, which may be empty.
+        """
+        ticker = self.ticker(symbol)
+        return self.call(("metadata", symbol),
+                         lambda: ticker.get_history_metadata())
+
+    def download(self, tickers, **kwargs):
+        """
+        Fetch the histories of several tickers in one request.
+
+        Args:
+            tickers (list): The symbols to download.
+            **kwargs: Arguments of yf.download, e.g. period, interval.
+
+        Returns:
+            DataFrame: The histories as returned by yf.download, without
+            the tickers that still had no data after the retries.
+        """
+        key = ("download", tuple(tickers), tuple(sorted(kwargs.items())))
+        try:
+            return self.call(key, lambda: self.batch(tickers, kwargs))
+        except MissingTickersError as error:  # Keep the tickers that arrived
+            logger.warning("%s", error)
+            return error.history
+
+    def batch(self, tickers, kwargs):
+        """
+        Call yf.download, raising for tickers it returned no data for.
+
+        Args:
+            tickers (list): The symbols to download.
+            kwargs (dict): Arguments of yf.download.
+
+        Returns:
+            DataFrame: The histories as returned by yf.download.
+        """
+        history = yf.download(tickers, session=self.session, **kwargs)
+        missing = [ticker for ticker in tickers if ticker not in history
+                   or history[ticker]["Close"].isna().all()]
+        if missing:
+            raise MissingTickersError(missing, history)
+        return history
+
+    def call(self, key, request):
+        """
+        Run a request, sharing the result with identical requests.
+
+        Args:
+            key (tuple): Identifies the request, equal for duplicates.
+            request (callable): Sends the request and returns its result.
+
+        Returns:
+            object: The result of the request.
+        """
+        with self.lock:
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+        if not owner:  # Same request already in flight, share its result
+            METRICS.count("fetch_deduplicated")
+            return future.result()
+        try:
+            future.set_result(self.send(request))
+        except Exception as error:
+            future.set_exception(error)
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+        return future.result()
+
+    def send(self, request):
+        """
+        Send a request within the rate limit, retrying transient errors.
+
+        Args:
+            request (callable): Sends the request and returns its result.
+
+        Returns:
+            object: The result of the request.
+        """
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                return request()
+            except Exception as error:
+                if attempt == self.retries or not is_transient(error):
+                    METRICS.count("fetch_errors")
+                    raise
+                METRICS.count("fetch_retries")
+                delay = min(FETCH_BACKOFF_MAX, self.backoff * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1))  # Spread retries
+
+
+GATEWAY = FetchGateway()  # Every Yahoo Finance request goes through it
+
+
+class RingBuffer:
+    """
+    Fixed-capacity column store that keeps the newest bars of a series.
+
+    Appending is amortized O(1) per bar and, once capacity is reached,
+    each new bar evicts the oldest. Every column is stored once, followed
+    by spare slots: new bars are written into the spare slots and
+    evictions only move the start, so the live window is always one
+    contiguous slice and readers get views without copying. When the
+    spare slots run out, the live window is copied to new arrays sized
+    to the bars held plus RING_SLACK, so views handed out earlier stay
+    valid and memory follows the bars held, never much above capacity.
+
+    The arrays, start, size and append count are published together as
+    one tuple after each write, so readers on other threads always see
+    a consistent window without taking a lock. Writes must be serialized
+    by the caller.
+
+    Args:
+        capacity (int): Maximum number of bars kept.
+        dtypes (tuple): NumPy dtype of each column.
+        initial (int): Bars to allocate room for up front.
+
+    Attributes:
+        appended (int): Number of bars appended since creation, which
+            makes appended - len(buffer) the running index of the
+            oldest bar held.
+    """
+    __slots__ = ("capacity", "state")
+
+    def __init__(self, capacity, dtypes, initial=64):
+        self.capacity = max(1, capacity)
+        allocated = min(self.capacity, initial)
+        # Columns, first slot, bars held and bars appended
+        self.state = ([np.empty(allocated, dtype) for dtype in dtypes],
+                      0, 0, 0)
+
+    def __len__(self):
+        return self.state[2]
+
+    @property
+    def appended(self):
+        """Number of bars appended since creation."""
+        return self.state[3]
+
+    def columns(self):
+        """
+        Return views of the held bars, oldest first.
+
+        Returns:
+            tuple: One contiguous view per column.
+        """
+        data, start, size, _ = self.state
+        return tuple(column[start:start + size] for column in data)
+
+    def extend(self, columns):
+        """
+        Append bars, evicting the oldest ones once full.
+
+        Args:
+            columns (tuple): One array of new values per column.
+        """
+        count = len(columns[0])
+        if count == 0:
+            return
+        data, start, size, appended = self.state
+        held = min(size + count, self.capacity)
+        if count > held:  # Only the newest bars can fit
+            columns = [values[-held:] for values in columns]
+        new = min(count, held)
+        end = start + size
+        if end + new <= len(data[0]):  # Fits in the spare slots
+            for column, values in zip(data, columns):
+                column[end:end + new] = values
+            self.state = (data, end + new - held, held, appended + count)
+            return
+        kept = held - new  # Old bars that are not evicted
+        allocated = held + max(RING_SLACK_MIN, int(held * RING_SLACK))
+        compacted = []
+        for column, values in zip(data, columns):
+            array = np.empty(allocated, column.dtype)
+            array[:kept] = column[end - kept:end]
+            array[kept:held] = values
+            compacted.append(array)
+        self.state = (compacted, 0, held, appended + count)
+
+    def replace_last(self, values):
+        """
+        Overwrite the newest bar, e.g. one that was still forming.
+
+        Args:
+            values (tuple): One value per column.
+        """
+        data, start, size, _ = self.state
+        for column, value in zip(data, values):
+            column[start + size - 1] = value
+
+    def discard(self, count):
+        """
+        Evict the oldest bars.
+
+        Args:
+            count (int): Number of bars to evict.
+        """
+        data, start, size, appended = self.state
+        count = min(count, size)
+        self.state = (data, start + count, size - count, appended)
+
+
+class Indicator:
+    """
+    Base class of technical indicators that update in O(1) per bar.
+
+    seed() computes the outputs of a whole series in one vectorized pass
+    and keeps the state after the second to last bar, since the last bar
+    may still be forming. commit() advances the state by one complete
+    bar, preview() computes the outputs of a forming bar and leaves the
+    state as it was.
+
+    Bars are tuples of timestamp, open, high, low, close and volume.
+    """
+    names = ()  # Output series, one value per bar each
+
+    def seed(self, columns):
+        """
+        Compute the outputs of a series and keep its state.
+
+        Args:
+            columns (tuple): Timestamps, open, high, low, close and
+            volume arrays.
+
+        Returns:
+            list: One array per output series.
+        """
+        raise NotImplementedError
+
+    def preview(self, bar):
+        """
+        Return the outputs of a forming bar.
+
+        Args:
+            bar (tuple): The bar.
+
+        Returns:
+            tuple: One value per output series.
+        """
+        raise NotImplementedError
+
+    def commit(self, bar):
+        """
+        Advance the state by a complete bar.
+
+        Args:
+            bar (tuple): The bar.
+
+        Returns:
+            tuple: One value per output series.
+        """
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """
+    Simple moving average of the close over a window of bars.
+
+    Args:
+        period (int): Bars in the window.
+    """
+    names = ("sma",)
+
+    def __init__(self, period=INDICATOR_PERIOD):
+        self.period = period
+
+    def seed(self, columns):
+        close = columns[4].astype(float)
+        self.window = deque(close[-self.period - 1:-1].tolist(),
+                            maxlen=self.period)
+        self.total = sum(self.window)
+        return [pd.Series(close).rolling(self.period).mean().to_numpy()]
+
+    def preview(self, bar):
+        if len(self.window) < self.period - 1:
+            return (np.nan,)
+        leaving = self.window[0] if len(self.window) == self.period else 0
+        return ((self.total + bar[4] - leaving) / self.period,)
+
+    def commit(self, bar):
+        values = self.preview(bar)
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(bar[4])
+        self.total += bar[4]
+        return values
+
+
+class EMA(Indicator):
+    """
+    Exponential moving average of the close.
+
+    Args:
+        period (int): Span of the average, alpha is 2 / (period + 1).
+    """
+    names = ("ema",)
+
+    def __init__(self, period=INDICATOR_PERIOD):
+        self.alpha = 2 / (period + 1)
+
+    def seed(self, columns):
+        close = columns[4].astype(float)
+        ema = pd.Series(close).ewm(alpha=self.alpha,
+                                   adjust=False).mean().to_numpy()
+        self.ema = ema[-2] if len(ema) > 1 else np.nan
+        return [ema]
+
+    def preview(self, bar):
+        if np.isnan(self.ema):
+            return (bar[4],)
+        return (self.ema + self.alpha * (bar[4] - self.ema),)
+
+    def commit(self, bar):
+        values = self.preview(bar)
+        self.ema = values[0]
+        return values
+
+
+class VWAP(Indicator):
+    """
+    Volume weighted average of the typical price, reset every day.
+
+    Bars without volume, such as indices and exchange rates, have no
+    VWAP.
+
+    Args:
+        offset (int): UTC offset of the exchange in seconds, so days
+        start at the exchange's midnight.
+    """
+    names = ("vwap",)
+
+    def __init__(self, offset=0):
+        self.offset = offset
+
+    def seed(self, columns):
+        timestamps, _, high, low, close, volume = columns
+        session = (timestamps + self.offset) // DAY
+        volume = volume.astype(float)
+        price_volume = (high + low + close) / 3 * volume
+        cum_price_volume = np.cumsum(price_volume)
+        cum_volume = np.cumsum(volume)
+        # Index of the first bar of each bar's session
+        start = np.zeros(len(session), dtype=int)
+        changes = np.flatnonzero(np.diff(session)) + 1
+        start[changes] = changes
+        start = np.maximum.accumulate(start)
+        session_price_volume = (cum_price_volume - cum_price_volume[start]
+                                + price_volume[start])
+        session_volume = cum_volume - cum_volume[start] + volume[start]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.where(session_volume > 0,
+                            session_price_volume / session_volume, np.nan)
+        if len(session) > 1:
+            self.session = session[-2]
+            self.price_volume = session_price_volume[-2]
+            self.volume = session_volume[-2]
+        else:
+            self.session, self.price_volume, self.volume = None, 0.0, 0.0
+        return [vwap]
+
+    def accumulate(self, bar):
+        """
+        Return the session, price volume and volume including a bar.
+        """
+        timestamp, _, high, low, close, volume = bar
+        session = (timestamp + self.offset) // DAY
+        price_volume = (high + low + close) / 3 * volume
+        if session != self.session:  # A new day starts the sums again
+            return session, price_volume, volume
+        return (session, self.price_volume + price_volume,
+                self.volume + volume)
+
+    def preview(self, bar):
+        _, price_volume, volume = self.accumulate(bar)
+        return (price_volume / volume if volume > 0 else np.nan,)
+
+    def commit(self, bar):
+        self.session, self.price_volume, self.volume = self.accumulate(bar)
+        return (self.price_volume / self.volume
+                if self.volume > 0 else np.nan,)
+
+
+class BollingerBands(Indicator):
+    """
+    Bands a number of standard deviations above and below the SMA.
+
+    Args:
+        period (int): Bars in the window.
+        width (float): Standard deviations between band and average.
+    """
+    names = ("bb_upper", "bb_middle", "bb_lower")
+
+    def __init__(self, period=INDICATOR_PERIOD, width=BOLLINGER_WIDTH):
+        self.period = period
+        self.width = width
+
+    def seed(self, columns):
+        close = pd.Series(columns[4].astype(float))
+        self.window = deque(close.to_numpy()[-self.period - 1:-1].tolist(),
+                            maxlen=self.period)
+        self.total = sum(self.window)
+        self.squares = sum(value * value for value in self.window)
+        rolling = close.rolling(self.period)
+        middle = rolling.mean().to_numpy()
+        deviation = rolling.std(ddof=0).to_numpy()
+        return [middle + self.width * deviation, middle,
+                middle - self.width * deviation]
+
+    def preview(self, bar):
+        if len(self.window) < self.period - 1:
+            return (np.nan, np.nan, np.nan)
+        close = bar[4]
+        leaving = self.window[0] if len(self.window) == self.period else 0
+        mean = (self.total + close - leaving) / self.period
+        variance = ((self.squares + close * close - leaving * leaving)
+                    / self.period - mean * mean)
+        deviation = self.width * max(variance, 0) ** 0.5
+        return (mean + deviation, mean, mean - deviation)
+
+    def commit(self, bar):
+        values = self.preview(bar)
+        if len(self.window) == self.period:
+            leaving = self.window[0]
+            self.total -= leaving
+            self.squares -= leaving * leaving
+        self.window.append(bar[4])
+        self.total += bar[4]
+        self.squares += bar[4] * bar[4]
+        return values
+
+
+class RSI(Indicator):
+    """
+    Relative strength index with Wilder's smoothing.
+
+    Args:
+        period (int): Smoothing period, alpha is 1 / period.
+    """
+    names = ("rsi",)
+
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.alpha = 1 / period
+
+    def seed(self, columns):
+        close = columns[4].astype(float)
+        change = np.diff(close, prepend=close[:1])
+        gain = pd.Series(np.maximum(change, 0)).ewm(
+            alpha=self.alpha, adjust=False).mean().to_numpy()
+        loss = pd.Series(np.maximum(-change, 0)).ewm(
+            alpha=self.alpha, adjust=False).mean().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 * gain / (gain + loss)
+        rsi[:self.period] = np.nan  # Too few bars to be meaningful
+        self.count = len(close) - 1  # Bars committed
+        if self.count > 0:
+            self.previous = close[-2]
+            self.gain, self.loss = gain[-2], loss[-2]
+        else:
+            self.previous, self.gain, self.loss = None, 0.0, 0.0
+        return [rsi]
+
+    def smooth(self, bar):
+        """
+        Return the average gain and loss including a bar.
+        """
+        if self.previous is None:  # The first bar has no change
+            return 0.0, 0.0
+        change = bar[4] - self.previous
+        gain = self.gain + self.alpha * (max(change, 0) - self.gain)
+        loss = self.loss + self.alpha * (max(-change, 0) - self.loss)
+        return gain, loss
+
+    def value(self, gain, loss, count):
+        """
+        Return the RSI of smoothed gains and losses over count bars.
+        """
+        if count <= self.period or gain + loss == 0:
+            return np.nan
+        return 100 * gain / (gain + loss)
+
+    def preview(self, bar):
+        return (self.value(*self.smooth(bar), self.count + 1),)
+
+    def commit(self, bar):
+        self.gain, self.loss = self.smooth(bar)
+        self.previous = bar[4]
+        self.count += 1
+        return (self.value(self.gain, self.loss, self.count),)
+
+
+class IndicatorEngine:
+    """
+    Keeps technical indicators of a symbol up to date with its bars.
+
+    Only the O(1) state of each indicator and the outputs of the newest
+    bar are kept, so replacing the forming bar or appending a bar costs
+    O(1) per indicator and no memory per bar. Whole output series are
+    computed on demand by series(), e.g. for a plot that shows them.
+
+    Args:
+        offset (int): UTC offset of the exchange in seconds, for VWAP.
+
+    Attributes:
+        latest (dict): Output name to its value for the newest bar.
+    """
+
+    def __init__(self, offset=0):
+        self.offset = offset
+        self.indicators = self.create(offset)
+        self.names = tuple(name for indicator in self.indicators
+                           for name in indicator.names)
+        self.latest = dict.fromkeys(self.names, np.nan)
+        self.last = None  # Newest bar, which may still be forming
+
+    @staticmethod
+    def create(offset):
+        """
+        Create one of each indicator.
+
+        Args:
+            offset (int): UTC offset of the exchange in seconds.
+
+        Returns:
+            tuple: The indicators, in output order.
+        """
+        return (SMA(), EMA(), VWAP(offset), BollingerBands(), RSI())
+
+    def reset(self, columns):
+        """
+        Restart every indicator from a whole series.
+
+        Args:
+            columns (tuple): Timestamps, open, high, low, close and
+            volume arrays of the bars held.
+        """
+        if len(columns[0]) == 0:
+            self.latest = dict.fromkeys(self.names, np.nan)
+            self.last = None
+            return
+        outputs = [values for indicator in self.indicators
+                   for values in indicator.seed(columns)]
+        self.latest = {name: float(values[-1])
+                       for name, values in zip(self.names, outputs)}
+        self.last = tuple(float(column[-1]) for column in columns)
+
+    def outputs(self, method, bar):
+        """
+        Return the outputs of every indicator for one bar.
+
+        Args:
+            method (str): "commit" or "preview".
+            bar (tuple): The bar.
+
+        Returns:
+            dict: Output name to value.
+        """
+        return dict(zip(self.names, (
+            value for indicator in self.indicators
+            for value in getattr(indicator, method)(bar))))
+
+    def replace_last(self, bar):
+        """
+        Update the outputs of the forming bar.
+
+        Args:
+            bar (tuple): The new values of the last bar.
+        """
+        self.last = tuple(map(float, bar))
+        self.latest = self.outputs("preview", self.last)
+
+    def extend(self, columns):
+        """
+        Complete the forming bar and add new bars.
+
+        Args:
+            columns (tuple): One sequence of new values per bar column.
+        """
+        bars = [tuple(map(float, bar)) for bar in zip(*columns)]
+        if not bars:
+            return
+        if self.last is not None:  # The forming bar is complete now
+            self.outputs("commit", self.last)
+        for bar in bars[:-1]:
+            self.outputs("commit", bar)
+        self.last = bars[-1]
+        self.latest = self.outputs("preview", self.last)
+
+    def series(self, columns):
+        """
+        Compute the output series of the bars held.
+
+        Runs fresh indicators over the bars in one vectorized pass, so
+        the state kept for updates is left as it was.
+
+        Args:
+            columns (tuple): Timestamps, open, high, low, close and
+            volume arrays of the bars held.
+
+        Returns:
+            dict: Output name to a float32 array aligned with the bars.
+        """
+        if len(columns[0]) == 0:
+            return {name: np.empty(0, np.float32) for name in self.names}
+        return dict(zip(self.names, (
+            np.array(values, dtype=np.float32)
+            for indicator in self.create(self.offset)
+            for values in indicator.seed(columns))))
+
+
+class HistoryCache:
+    """
+    Persistent SQLite store of OHLCV bars keyed by symbol and interval.
+
+    Lets SymbolData start from the bars saved by a previous run and only
+    fetch the missing tail from Yahoo Finance. Each series records the
+    time from which it holds every bar, so a longer PERIOD fetches the
+    missing head too. Bars older than the interval's CACHE_EXPIRY are
+    pruned, and when the store grows beyond max_rows the least recently
+    used series are evicted.
+
+    Args:
+        filename (str): Path to the SQLite database file.
+        max_rows (int): Maximum number of bars kept across all series.
+    """
+
+    def __init__(self, filename=CACHE_FILE, max_rows=CACHE_MAX_ROWS):
+        self.filename = filename
+        self.max_rows = max_rows
+        self.lock = threading.Lock()  # Shared by the loader threads
+        self.connection = None  # Opened lazily on first use
+        self.row_count = 0  # Approximate, recounted before evicting
+
+    def connect(self):
+        """
+        Open the database and create the tables if needed.
+
+        Returns:
+            Connection: The open SQLite connection.
+        """
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.filename,
+                                              check_same_thread=False)
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT, interval TEXT, ts INTEGER,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (symbol, interval, ts)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS series (
+                    symbol TEXT, interval TEXT, tz TEXT, last_access REAL,
+                    start INTEGER,
+                    PRIMARY KEY (symbol, interval)
+                );
+            """)
+            self.row_count = self.connection.execute(
+                "SELECT COUNT(*) FROM bars").fetchone()[0]
+        return self.connection
+
+    def load(self, symbol, interval):
+        """
+        Load the cached bars of a symbol that have not expired.
+
+        Args:
+            symbol (str): The stock symbol.
+            interval (str): The bar interval, e.g. "1m".
+
+        Returns:
+            tuple: Cached bars indexed by time, or None if nothing usable
+            is cached, and the epoch seconds from which every bar is
+            cached, or None if unknown.
+        """
+        cutoff = int(time.time() - CACHE_EXPIRY.get(interval, DAY))
+        with self.lock:
+            connection = self.connect()
+            series = connection.execute(
+                "SELECT tz, start FROM series "
+                "WHERE symbol = ? AND interval = ?",
+                (symbol, interval)).fetchone()
+            if series is None:
+                return None, None
+            rows = connection.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts",
+                (symbol, interval, cutoff)).fetchall()
+            connection.execute(
+                "UPDATE series SET last_access = ? "
+                "WHERE symbol = ? AND interval = ?",
+                (time.time(), symbol, interval))
+            connection.commit()
+        if not rows:
+            return None, None
+        history = pd.DataFrame(
+            rows, columns=["ts", "Open", "High", "Low", "Close", "Volume"])
+        index = pd.to_datetime(history.pop("ts"), unit="s", utc=True)
+        history.index = pd.DatetimeIndex(index).tz_convert(series[0])
+        return history, series[1]
+
+    def store(self, symbol, interval, history):
+        """
+        Save bars for a symbol, replacing any bars with the same timestamp.
+
+        Args:
+            symbol (str): The stock symbol.
+            interval (str): The bar interval, e.g. "1m".
+            history (DataFrame): Bars indexed by a timezone-aware index.
+        """
+        if history.empty:
+            return
+        timestamps = history.index.as_unit("s").asi8.tolist()
+        columns = history[["Open", "High", "Low", "Close", "Volume"]]
+        rows = [(symbol, interval, ts, *values) for ts, values
+                in zip(timestamps, columns.itertuples(index=False))]
+        cutoff = int(time.time() - CACHE_EXPIRY.get(interval, DAY))
+        with self.lock:
+            connection = self.connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+            connection.execute(
+                "INSERT INTO series (symbol, interval, tz, last_access) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (symbol, interval) DO "
+                "UPDATE SET tz = excluded.tz, "
+                "last_access = excluded.last_access",
+                (symbol, interval, str(history.index.tz), time.time()))
+            # Drop bars that are past the interval's expiry
+            connection.execute(
+                "DELETE FROM bars WHERE symbol = ? AND interval = ? "
+                "AND ts < ?", (symbol, interval, cutoff))
+            self.row_count += len(rows)
+            if self.row_count > self.max_rows:
+                self.evict(connection)
+            connection.commit()
+
+    def cover(self, symbol, interval, start):
+        """
+        Record that every bar of a series after start has been stored.
+
+        Coverage only grows, so storing a later tail keeps the start of
+        the fetch that reached furthest back.
+
+        Args:
+            symbol (str): The stock symbol.
+            interval (str): The bar interval, e.g. "1m".
+            start (int): Epoch seconds from which no bar is missing.
+        """
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "UPDATE series SET start = MIN(COALESCE(start, ?), ?) "
+                "WHERE symbol = ? AND interval = ?",
+                (start, start, symbol, interval))
+            connection.commit()
+
+    def evict(self, connection):
+        """
+        Remove least recently used series until within the size limit.
+
+        Args:
+            connection (Connection): The open SQLite connection.
+        """
+        self.row_count = connection.execute(
+            "SELECT COUNT(*) FROM bars").fetchone()[0]
+        series = connection.execute(
+            "SELECT symbol, interval FROM series "
+            "ORDER BY last_access").fetchall()
+        for symbol, interval in series:
+            if self.row_count <= self.max_rows:
+                break
+            removed = connection.execute(
+                "DELETE FROM bars WHERE symbol = ? AND interval = ?",
+                (symbol, interval)).rowcount
+            connection.execute(
+                "DELETE FROM series WHERE symbol = ? AND interval = ?",
+                (symbol, interval))
+            self.row_count -= removed
+
+
+HISTORY_CACHE = HistoryCache()  # Shared by every SymbolData
+
+
+class MetadataCache:
+    """
+    Persistent JSON store of slow-changing symbol metadata.
+
+    Holds currency, exchange, timezone and minor-unit information per
+    symbol, so the large `info` payload is not requested on every
+    SymbolData construction. Entries older than METADATA_TTL are
+    refetched, preferring the metadata that comes with a history call.
+
+    Args:
+        filename (str): Path to the JSON file.
+        ttl (float): Seconds before an entry is refetched.
+    """
+
+    def __init__(self, filename=METADATA_FILE, ttl=METADATA_TTL):
+        self.filename = filename
+        self.ttl = ttl
+        self.lock = threading.Lock()  # Shared by the loader threads
+        self.entries = None  # Loaded lazily on first use
+
+    def get(self, symbol, stock):
+        """
+        Return the metadata of a symbol, fetching it when missing or stale.
+
+        A stale entry is still returned if the fetch fails.
+
+        Args:
+            symbol (str): The stock symbol.
+            stock (Ticker): yfinance ticker used when a fetch is needed.
+
+        Returns:
+            dict: currency, exchange, timezone, quote_currency and
+            minor_unit of the symbol.
+        """
+        with self.lock:
+            if self.entries is None:
+                try:
+                    with open(self.filename, "r") as f:
+                        self.entries = json.load(f)
+                except FileNotFoundError:
+                    self.entries = {}
+            entry = self.entries.get(symbol)
+        if entry is not None and time.time() - entry["fetched"] < self.ttl:
+            return entry
+        try:
+            with METRICS.timer("metadata_fetch"):
+                fetched = self.fetch(stock)
+        except Exception:
+            if entry is None:
+                raise
+            return entry  # Offline, a stale entry beats none
+        entry = fetched
+        with self.lock:
+            self.entries[symbol] = entry
+            with open(self.filename, "w") as f:
+                json.dump(self.entries, f, indent=4)
+        return entry
+
+    @staticmethod
+    def fetch(stock):
+        """
+        Fetch metadata for a ticker from Yahoo Finance.
+
+        Uses the metadata returned alongside the price history, which is
+        already downloaded, and only falls back to `info` when it lacks
+        the currency.
+
+        Args:
+            stock (Ticker): The yfinance ticker.
+
+        Returns:
+            dict: The metadata entry with its fetch timestamp.
+        """
+        metadata = GATEWAY.metadata(stock.ticker) or {}
+        quote_currency = metadata.get("currency")
+        if quote_currency is None:
+            quote_currency = GATEWAY.info(stock.ticker)["currency"]
+        currency, minor_unit = MINOR_UNITS.get(quote_currency,
+                                               (quote_currency, 1))
+        return {
+            "currency": currency,  # Major unit, e.g. GBP
+            "quote_currency": quote_currency,  # As quoted, e.g. GBp
+            "minor_unit": minor_unit,  # Quoted prices per major unit
+            "exchange": metadata.get("exchangeName"),
+            "timezone": metadata.get("exchangeTimezoneName"),
+            "fetched": time.time(),
+        }
+
+
+METADATA_CACHE = MetadataCache()  # Shared by every SymbolData
+
+
+class StockManager:
+    """
+    Manages a collection of SymbolData objects representing stock holdings.
+
+    Provides methods to add new stock data and access them in a
+    dictionary-like manner. Used as a central repository for all
+    stock-related data within the application. New prices come from a
+    QuoteSource, which defaults to polling Yahoo Finance.
+
+    Every write that changes a symbol's bars bumps a version, so
+    consumers ask changed_since() for the symbols that changed after
+    the version they last saw instead of rescanning every symbol.
+
+    Args:
+        source (QuoteSource): Where new prices come from.
+
+    Attributes:
+        version (int): Bumped on every change of any symbol.
+        versions (dict): {symbol: version of its last change}, ordered
+            from the least to the most recently changed.
+        members (int): Bumped whenever symbols are added or replaced.
+    """
+
+    def __init__(self, source=None):
+        self.stocks = {}  # Dictionary to hold stock objects
+        self.source = source or PollingQuoteSource()  # Where prices come from
+        self.pool = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS)
+        self.pending = {}  # {symbol: Future} of refreshes in flight
+        # Guards pending, reentrant as a refresh that is already done runs
+        # its finish callback inside add_done_callback
+        self.lock = threading.RLock()
+        self.version = 0
+        self.versions = {}
+        self.version_lock = threading.Lock()  # Guards version, versions
+        self.members = 0
+
+    def mark(self, symbols):
+        """
+        Record that the bars of symbols changed.
+
+        Args:
+            symbols (iterable): The changed symbols.
+        """
+        with self.version_lock:
+            for symbol in symbols:
+                self.version += 1
+                self.versions.pop(symbol, None)  # Move to the end
+                self.versions[symbol] = self.version
+
+    def changed_since(self, version):
+        """
+        Return the symbols that changed after a version.
+
+        Walks the changes from the most recent one back, so the cost
+        follows the number of changed symbols, not of managed ones.
+
+        Args:
+            version (int): The version the caller last saw.
+
+        Returns:
+            tuple: A list of the changed symbols and the current
+            version, to pass in next time.
+        """
+        changed = []
+        with self.version_lock:
+            for symbol, changed_at in reversed(self.versions.items()):
+                if changed_at <= version:
+                    break
+                changed.append(symbol)
+            return changed, self.version
+
+    def add_stock(self, stock):
+        """
+        Add a SymbolData object to the manager.
+
+        Args:
+            stock (SymbolData): The stock data object to add.
+        """
+        self.stocks[stock.symbol] = stock
+        self.members += 1
+        self.mark((stock.symbol,))
+
+    def __getitem__(self, key):
+        """
+        Retrieve a SymbolData object by its symbol.
+
+        Args:
+            key (str): The symbol of the stock to retrieve.
+
+        Returns:
+            SymbolData: The corresponding stock data object.
+        """
+        return self.stocks[key]
+
+    def replace(self, stocks):
+        """
+        Replace all managed SymbolData objects at once.
+
+        The dictionary is swapped rather than mutated, so readers on
+        other threads never iterate a half-filled collection.
+
+        Args:
+            stocks (list): The new SymbolData objects.
+        """
+        self.stocks = {stock.symbol: stock for stock in stocks}
+        self.members += 1
+        self.mark(self.stocks)  # New bars for every symbol
+
+    def __contains__(self, key):
+        """
+        Check whether a symbol is managed.
+
+        Args:
+            key (str): The symbol to look for.
+
+        Returns:
+            bool: True if the symbol has a SymbolData object.
+        """
+        return key in self.stocks
+
+    def refresh(self, symbols=None):
+        """
+        Incrementally refresh the price history of managed symbols.
+
+        Each SymbolData only fetches the bars after its last stored
+        timestamp. Symbols are refreshed concurrently in a bounded thread
+        pool and a failing symbol keeps its previous data. A request for
+        a symbol that is already being refreshed waits for that refresh
+        instead of starting another one. Only symbols whose bars differ
+        from before count as updated, and symbols no longer managed,
+        e.g. dropped by a reload meanwhile, are skipped.
+
+        Args:
+            symbols (list): Symbols to refresh. Defaults to all of them.
+
+        Returns:
+            tuple: A list of symbols that received new data, and a
+            dictionary mapping each failed symbol to its error message.
+        """
+        if symbols is None:
+            symbols = list(self.stocks)
+        stocks = self.stocks  # Replaced, never mutated
+        futures = {}
+        with self.lock:
+            for symbol in symbols:
+                future = self.pending.get(symbol)
+                if future is None:  # Nothing in flight, start a refresh
+                    if symbol not in stocks:
+                        continue
+                    future = self.pool.submit(stocks[symbol].refresh)
+                    self.pending[symbol] = future
+                    future.add_done_callback(
+                        lambda _, symbol=symbol: self.finish(symbol))
+                futures[future] = symbol
+        updated = []
+        failures = {}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                if future.result():
+                    updated.append(symbol)
+            except Exception as error:  # Keep stale data for symbol
+                failures[symbol] = str(error) or type(error).__name__
+        self.mark(updated)
+        return updated, failures
+
+    def poll(self):
+        """
+        Ask the quote source for new data, once per fetch cycle.
+
+        Returns:
+            tuple: A list of symbols that received new data, and a
+            dictionary mapping each failed symbol to its error message.
+        """
+        return self.source.poll(self)
+
+    def apply_tick(self, symbol, price, timestamp, volume=0):
+        """
+        Merge a streamed trade price into a symbol's last bar.
+
+        Args:
+            symbol (str): The symbol the price is for.
+            price (float): The traded price, in quote units.
+            timestamp (int): Time of the trade in epoch seconds.
+            volume (int): Volume to add to the bar.
+
+        Returns:
+            bool: True if the symbol is managed and its bars changed.
+        """
+        stock = self.stocks.get(symbol)
+        if stock is None or not stock.apply_tick(price, timestamp, volume):
+            return False
+        self.mark((symbol,))
+        return True
+
+    def apply_bar(self, symbol, timestamp, open, high, low, close, volume):
+        """
+        Merge a complete or forming bar into a symbol's bars.
+
+        Args:
+            symbol (str): The symbol the bar is for.
+            timestamp (int): Start of the bar in epoch seconds.
+            open (float): Opening price.
+            high (float): High price.
+            low (float): Low price.
+            close (float): Closing price.
+            volume (int): Volume.
+
+        Returns:
+            bool: True if the symbol is managed and its bars changed.
+        """
+        stock = self.stocks.get(symbol)
+        if stock is None or not stock.apply_bar(timestamp, open, high, low,
+                                                close, volume):
+            return False
+        self.mark((symbol,))
+        return True
+
+    def finish(self, symbol):
+        """
+        Forget a completed refresh so the next request starts a new one.
+
+        Args:
+            symbol (str): The symbol whose refresh completed.
+        """
+        with self.lock:
+            self.pending.pop(symbol, None)
+
+
+def market_phase(exchange, timezone, now=None):
+    """
+    Return the trading phase of an exchange at a moment in time.
+
+    Holidays are not known, an exchange is open on every weekday.
+
+    Args:
+        exchange (str): Yahoo exchangeName, e.g. "STO".
+        timezone (str): The exchange's timezone, e.g. "Europe/Stockholm".
+        now (float): Epoch seconds. Defaults to the current time.
+
+    Returns:
+        str: "open", "pre", "post" or "closed". Exchanges with unknown
+        hours or timezone are reported as "open".
+    """
+    hours = EXCHANGE_HOURS.get(exchange)
+    if exchange in ALWAYS_OPEN or hours is None or not timezone:
+        return "open"
+    try:
+        local = datetime.fromtimestamp(
+            time.time() if now is None else now, ZoneInfo(timezone))
+    except (KeyError, ValueError):  # Unknown timezone name
+        return "open"
+    if local.weekday() >= 5:  # Saturday or Sunday
+        return "closed"
+    minute = local.hour * HOUR + local.minute
+    pre, open, close, post = hours
+    if open <= minute < close:
+        return "open"
+    if pre <= minute < open:
+        return "pre"
+    if close <= minute < post:
+        return "post"
+    return "closed"
+
+
+class PollScheduler:
+    """
+    Decides which symbols are due for a poll, from their market phase.
+
+    Open markets are polled every UPDATE_INTERVAL and symbols that are
+    moving more often, pre- and post-market sessions less often. A
+    symbol is moving when its last poll found the close ACTIVE_MOVE
+    away from the poll before, or pushed quotes moved it that far since.
+    A closed market is polled once more after it closes, for the final
+    bars, and then not again until it reopens.
+
+    Attributes:
+        last (dict): {symbol: (time, price, phase, move)} of the last
+            poll, move being the relative change of the close since the
+            poll before.
+    """
+
+    def __init__(self):
+        self.last = {}
+
+    @staticmethod
+    def tick():
+        """
+        Return how often due() should be called.
+
+        Returns:
+            float: Seconds, the shortest poll interval of any phase.
+        """
+        return get_settings().UPDATE_INTERVAL * min(POLL_FACTORS.values())
+
+    def interval(self, stock, now):
+        """
+        Return how long a symbol may go without a poll.
+
+        Args:
+            stock (SymbolData): The symbol.
+            now (float): Epoch seconds.
+
+        Returns:
+            float: Seconds, or None while its market is closed.
+        """
+        phase = market_phase(stock.exchange, stock.timezone, now)
+        if phase == "closed":
+            return None
+        if phase == "open" and stock.symbol in self.last:
+            _, price, _, move = self.last[stock.symbol]
+            if price:  # Pushed quotes may have moved it since the poll
+                move = max(move, abs(float(stock.close[-1]) / price - 1))
+            if move >= ACTIVE_MOVE:
+                phase = "active"
+        return get_settings().UPDATE_INTERVAL * POLL_FACTORS[phase]
+
+    def due(self, stocks, now=None):
+        """
+        Return the symbols to poll now.
+
+        Symbols never polled count as polled when they were loaded.
+
+        Args:
+            stocks (dict): {symbol: SymbolData} of the managed symbols.
+            now (float): Epoch seconds. Defaults to the current time.
+
+        Returns:
+            list: The symbols that are due.
+        """
+        now = time.time() if now is None else now
+        slack = self.tick() / 2  # Timers may fire slightly early
+        due = []
+        for symbol, stock in stocks.items():
+            polled, _, phase, _ = self.last.get(
+                symbol, (stock.fetched, None, "closed", 0))
+            interval = self.interval(stock, now)
+            if interval is None:
+                if phase != "closed":  # Once more for the final bars
+                    due.append(symbol)
+            elif now - polled + slack >= interval:
+                due.append(symbol)
+        METRICS.count("polls_skipped", len(stocks) - len(due))
+        return due
+
+    def polled(self, stocks, symbols, now=None):
+        """
+        Remember the time, price, market phase and move of polled symbols.
+
+        The move compares the close after this poll with the close after
+        the previous one, so it is measured before the next poll
+        overwrites the price it is compared with.
+
+        Args:
+            stocks (dict): {symbol: SymbolData} of the managed symbols.
+            symbols (list): The symbols that were polled.
+            now (float): Epoch seconds. Defaults to the current time.
+        """
+        now = time.time() if now is None else now
+        for symbol in symbols:
+            stock = stocks.get(symbol)
+            if stock is not None:
+                price = float(stock.close[-1])
+                previous = self.last.get(symbol, (None, None))[1]
+                move = abs(price / previous - 1) if previous else 0
+                self.last[symbol] = (
+                    now, price,
+                    market_phase(stock.exchange, stock.timezone, now), move)
+
+
+class QuoteSource:
+    """
+    Base class for where StockManager gets new prices from.
+
+    poll() is called once per UPDATE_INTERVAL from a worker thread.
+    Push sources also deliver prices between polls: start() hands them
+    a callback that they call, from their own thread, with the symbols
+    whose data changed.
+    """
+
+    def poll(self, stock_manager):
+        """
+        Fetch new data for the managed symbols.
+
+        Args:
+            stock_manager (StockManager): The manager to update.
+
+        Returns:
+            tuple: A list of symbols that received new data, and a
+            dictionary mapping each failed symbol to its error message.
+        """
+        return [], {}
+
+    def start(self, stock_manager, on_quotes):
+        """
+        Start delivering prices between polls.
+
+        Args:
+            stock_manager (StockManager): The manager to update.
+            on_quotes (callable): Called with a set of updated symbols.
+        """
+
+    def stop(self):
+        """
+        Stop delivering prices.
+        """
+
+
+class PollingQuoteSource(QuoteSource):
+    """
+    Polls Yahoo Finance for the bars after each symbol's last bar.
+
+    Only the symbols a PollScheduler finds due are polled, so closed
+    markets cost no requests.
+
+    Args:
+        scheduler (PollScheduler): Picks the symbols to poll.
+    """
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or PollScheduler()
+
+    def poll(self, stock_manager):
+        now = time.time()
+        stocks = stock_manager.stocks
+        symbols = self.scheduler.due(stocks, now)
+        updated, failures = stock_manager.refresh(symbols)
+        self.scheduler.polled(stocks, [symbol for symbol in symbols
+                                       if symbol not in failures], now)
+        return updated, failures
+
+
+class StreamingQuoteSource(PollingQuoteSource):
+    """
+    Streams trade prices from the Yahoo Finance websocket.
+
+    Every trade updates the last bar of its symbol in place, so prices
+    move within a second without an HTTP request per update. Polling
+    still runs once per UPDATE_INTERVAL to reconcile full bars.
+    """
+
+    def __init__(self, scheduler=None):
+        super().__init__(scheduler)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.websocket = None
+
+    def start(self, stock_manager, on_quotes):
+        self.stop()
+        self.stop_event = threading.Event()
+        self.stock_manager = stock_manager
+        self.on_quotes = on_quotes
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """
+        Listen to the websocket, reconnecting until stopped.
+
+        Failures are logged and counted in METRICS as stream_errors,
+        reconnects as stream_reconnects.
+        """
+        stop_event = self.stop_event
+        while not stop_event.is_set():
+            try:
+                with yf.WebSocket(verbose=False) as websocket:
+                    self.websocket = websocket
+                    websocket.subscribe(list(self.stock_manager.stocks))
+                    websocket.listen(self.on_message)
+            except Exception as error:  # Dropped or refused, retry below
+                METRICS.count("stream_errors")
+                logger.warning("Quote stream failed: %s", error)
+            if not stop_event.wait(STREAM_RETRY):
+                METRICS.count("stream_reconnects")
+
+    def on_message(self, message):
+        """
+        Apply one decoded websocket message.
+
+        Args:
+            message (dict): Has "id" (the symbol), "price" and "time"
+            in epoch milliseconds.
+        """
+        symbol = message.get("id")
+        price = message.get("price")
+        if symbol is None or price is None:
+            return
+        timestamp = int(message.get("time", time.time() * 1000)) // 1000
+        if self.stock_manager.apply_tick(symbol, price, timestamp):
+            self.on_quotes({symbol})
+
+    def stop(self):
+        self.stop_event.set()
+        if self.websocket is not None:
+            try:
+                self.websocket.close()  # Ends listen() in the thread
+            except Exception:
+                pass
+            self.websocket = None
+
+
+class ReplayQuoteSource(QuoteSource):
+    """
+    Replays recorded bars as if they arrived live.
+
+    Bars of all symbols are merged in time order and applied with the
+    recorded gaps between them divided by speed, without any network
+    access. A restarted replay resumes after the last applied bars.
+
+    Args:
+        bars (dict): Mapping of symbol to a DataFrame of bars with Open,
+        High, Low, Close and Volume columns, indexed by time.
+        speed (float): How many times faster than real time to replay.
+    """
+
+    def __init__(self, bars, speed=1.0):
+        self.bars = bars
+        self.speed = speed
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.applied = None  # Epoch seconds of the last applied bars
+
+    def start(self, stock_manager, on_quotes):
+        self.stop()
+        self.stop_event = threading.Event()
+        self.stock_manager = stock_manager
+        self.on_quotes = on_quotes
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """
+        Apply the bars in time order, sleeping the scaled recorded gaps.
+        """
+        stop_event = self.stop_event
+        frames = []
+        for symbol, history in self.bars.items():
+            frame = history[["Open", "High", "Low", "Close", "Volume"]].copy()
+            frame["Symbol"] = symbol
+            frames.append(frame)
+        if not frames:
+            return
+        merged = pd.concat(frames).sort_index(kind="stable")
+        timestamps = merged.index.as_unit("s").asi8
+        if self.applied is not None:  # Resume after the applied bars
+            merged = merged[timestamps > self.applied]
+            timestamps = timestamps[timestamps > self.applied]
+            previous = self.applied
+        elif len(timestamps):
+            previous = timestamps[0]
+        for timestamp, group in merged.groupby(timestamps, sort=True):
+            if stop_event.wait((timestamp - previous) / self.speed):
+                return
+            previous = timestamp
+            self.applied = timestamp
+            updated = set()
+            for symbol, bar in zip(group["Symbol"],
+                                   group.itertuples(index=False)):
+                if self.stock_manager.apply_bar(symbol, timestamp, bar.Open,
+                                                bar.High, bar.Low, bar.Close,
+                                                bar.Volume):
+                    updated.add(symbol)
+            if updated:
+                self.on_quotes(updated)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def create_quote_source(name):
+    """
+    Create the quote source selected by the QUOTE_SOURCE setting.
+
+    Args:
+        name (str): "poll" or "stream".
+
+    Returns:
+        QuoteSource: The quote source.
+    """
+    if name == "stream":
+        return StreamingQuoteSource()
+    return PollingQuoteSource()
+
+
+class CurrencyConvert:
+    """
+    Converts symbol prices to the local currency from an in-memory
+    table of exchange rates.
+
+    Every currency in the portfolio is quoted against FX_BASE, so one
+    batched download covers all of them and any cross rate is derived
+    as rates[local] / rates[currency]. A background thread refreshes the
+    table every FX_REFRESH seconds, so conversions never wait on the
+    network.
+
+    Args:
+        stock_manager (StockManager): The manager containing
+        all SymbolData objects.
+    """
+
+    def __init__(self, stock_manager):
+        self.rates = {FX_BASE: 1.0}  # {currency: units per FX_BASE}
+        self.stock_manager = stock_manager
+        self.stop_event = threading.Event()
+        self.thread = None  # Background refresh thread
+
+    def currencies(self):
+        """
+        Return every currency the portfolio needs rates for.
+
+        Returns:
+            set: The local currency and the currency of each symbol.
+        """
+        currencies = {stock.currency
+                      for stock in self.stock_manager.stocks.values()}
+        currencies.add(get_settings().LOCAL_CURRENCY)
+        return currencies
+
+    def refresh_rates(self):
+        """
+        Fetch all exchange rates against FX_BASE in one batched download.
+
+        Rates that could not be fetched keep their previous value.
+        """
+        currencies = sorted(self.currencies() - {FX_BASE})
+        if not currencies:
+            return
+        tickers = [f"{currency}=X" for currency in currencies]
+        with METRICS.timer("fx_fetch"):
+            history = GATEWAY.download(tickers, period="1d", interval="1m",
+                                       group_by="ticker", progress=False)
+        rates = dict(self.rates)
+        for currency, ticker in zip(currencies, tickers):
+            if ticker not in history:
+                continue
+            closes = history[ticker]["Close"].dropna()
+            if not closes.empty:
+                rates[currency] = float(closes.iloc[-1])
+        self.rates = rates  # Swap whole table, readers never see a mix
+
+    def start(self):
+        """
+        Load the rate table and keep refreshing it in the background.
+        """
+        self.refresh_rates()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def run(self):
+        """
+        Refresh the rate table every FX_REFRESH seconds until stopped.
+        """
+        while not self.stop_event.wait(FX_REFRESH):
+            try:
+                self.refresh_rates()
+            except Exception:  # Keep the old rates, retry next round
+                pass
+
+    def stop(self):
+        """
+        Stop the background refresh thread.
+        """
+        self.stop_event.set()
+
+    def rate(self, currency):
+        """
+        Return how many units of the local currency one unit is worth.
+
+        Args:
+            currency (str): The currency to convert from.
+
+        Returns:
+            float: The cross rate, or NaN if a rate is not available.
+        """
+        local = self.rates.get(get_settings().LOCAL_CURRENCY)
+        foreign = self.rates.get(currency)
+        if local is None or foreign is None:
+            METRICS.count("fx_misses")
+            return float("nan")
+        METRICS.count("fx_hits")
+        return local / foreign
+
+    def convert_to_local_currency(self, symbol):
+        """
+        Convert the last closing price of a symbol to the local currency.
+        Reads the exchange rate from the in-memory rate table and converts
+        the stock's closing price to the local currency.
+        Args:
+            symbol (str): The symbol to convert.
+        Returns:
+            float: The converted price in local currency.
+        """
+        stocklastclosed = self.stock_manager[symbol].last_price()
+        currency = self.stock_manager[symbol].currency
+        return stocklastclosed * self.rate(currency)  # Convert local currency
+
+
+class PortfolioValuation:
+    """
+    Values the whole portfolio in one vectorized pass.
+
+    Keeps last price and exchange rate of every symbol, and quantity
+    and purchase cost of every tax lot, in aligned NumPy arrays. Lot
+    values are array arithmetic and the values per symbol and per
+    account are grouped sums over the lots, so an update costs a few
+    vectorized passes however many lots there are. Only symbols that
+    changed in the stock manager or whose exchange rate moved are
+    re-read, and an update where no local price moved stops there.
+
+    Args:
+        stock_manager (StockManager): The manager containing
+        all SymbolData objects.
+        currency_convert (CurrencyConvert): Source of exchange rates.
+        lots (Lots): The tax lots. Defaults to one lot per symbol from
+        its quantity and value.
+
+    Attributes:
+        symbols (list): Symbols in array order.
+        close (ndarray): Last price per symbol in local currency.
+        actual (ndarray): Current value per symbol in local currency.
+        change (ndarray): Change from purchase value per symbol.
+        total (float): Current value of the whole portfolio.
+        total_change (float): Change of the whole portfolio.
+        changed (ndarray): Indices of symbols whose local close price
+            changed in the last update.
+        lot_value (ndarray): Current value per lot of a loaded symbol.
+        lot_change (ndarray): Change from purchase cost per lot.
+        accounts (list): Accounts in array order.
+        account_value (ndarray): Current value per account.
+        account_change (ndarray): Change from purchase cost per account.
+    """
+
+    def __init__(self, stock_manager, currency_convert, lots=None):
+        self.stock_manager = stock_manager
+        self.currency_convert = currency_convert
+        self.holdings = lots  # Fixed lots, or None to follow the stocks
+        self.symbols = []
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Realign the arrays with the symbols in the stock manager.
+
+        Lots of symbols that are not loaded are left out.
+        """
+        # Read first, so symbols added meanwhile trigger another rebuild
+        self.members = self.stock_manager.members
+        stocks = list(self.stock_manager.stocks.values())
+        self.symbols = [stock.symbol for stock in stocks]
+        lots = self.holdings
+        if lots is None:  # One lot per symbol
+            lots = Lots({stock.symbol: [stock.quantity, stock.value]
+                         for stock in stocks})
+        self.position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        # Position in self.symbols per lot, -1 when not loaded
+        lot_position = np.array([self.position.get(symbol, -1)
+                                 for symbol in lots.symbols],
+                                dtype=np.intp)[lots.symbol_index]
+        held = lot_position >= 0
+        self.lot_position = lot_position[held]
+        self.lot_account = lots.account_index[held]
+        self.lot_quantity = lots.quantity[held]
+        self.lot_cost = lots.cost[held]
+        self.accounts = lots.accounts
+        self.quantity = self.group(self.lot_position, self.lot_quantity,
+                                   len(stocks))
+        self.cost = self.group(self.lot_position, self.lot_cost, len(stocks))
+        self.account_cost = self.group(self.lot_account, self.lot_cost,
+                                       len(self.accounts))
+        self.lot_value = np.zeros(len(self.lot_cost))
+        self.lot_change = np.zeros(len(self.lot_cost))
+        self.account_value = np.zeros(len(self.accounts))
+        self.account_change = np.zeros(len(self.accounts))
+        # Each symbol's currency as an index into self.currencies
+        self.currencies, self.currency_index = np.unique(
+            np.array([stock.currency for stock in stocks], dtype=object),
+            return_inverse=True)
+        self.price = np.zeros(len(stocks))
+        self.fx = np.ones(len(stocks))
+        self.close = np.zeros(len(stocks))
+        self.actual = np.zeros(len(stocks))
+        self.change = np.zeros(len(stocks))
+        self.total = 0.0
+        self.total_change = 0.0
+        self.changed = np.arange(len(stocks))
+        self.rates = None  # Rate per currency at the last update
+        self.seen = self.stock_manager.version
+
+    def dirty(self, rates):
+        """
+        Return the symbols that need their price or exchange rate re-read.
+
+        Args:
+            rates (ndarray): Current exchange rate per currency.
+
+        Returns:
+            ndarray: Indices of the symbols whose bars changed since the
+            last update or whose exchange rate moved, every symbol right
+            after a rebuild.
+        """
+        symbols, self.seen = self.stock_manager.changed_since(self.seen)
+        if self.rates is None:
+            return np.arange(len(self.symbols))
+        dirty = np.array([self.position[symbol] for symbol in symbols
+                          if symbol in self.position], dtype=np.intp)
+        # Rates that are still missing have not moved
+        moved = np.flatnonzero((self.rates != rates)
+                               & ~(np.isnan(self.rates) & np.isnan(rates)))
+        if len(moved):
+            dirty = np.union1d(
+                dirty, np.flatnonzero(np.isin(self.currency_index, moved)))
+        return dirty
+
+    def update(self):
+        """
+        Recompute the values of changed symbols and the portfolio totals.
+        """
+        with METRICS.timer("valuation"):
+            if self.stock_manager.members != self.members:
+                self.rebuild()
+            rates = np.array([self.currency_convert.rate(currency)
+                              for currency in self.currencies], dtype=float)
+            rebuilt = self.rates is None
+            dirty = self.dirty(rates)
+            self.rates = rates
+            stocks = self.stock_manager.stocks
+            self.price[dirty] = [stocks[self.symbols[i]].last_price()
+                                 for i in dirty]
+            self.fx[dirty] = rates[self.currency_index[dirty]]
+            previous = self.close[dirty]
+            close = self.price[dirty] * self.fx[dirty]
+            self.close[dirty] = close
+            # A moved price or exchange rate both change the local close
+            moved = (close != previous) & ~(np.isnan(close)
+                                            & np.isnan(previous))
+            self.changed = dirty[moved]
+            if not len(self.changed) and not rebuilt:
+                return  # Values and totals still hold
+            self.lot_value = self.close[self.lot_position] * self.lot_quantity
+            self.lot_change = self.lot_value - self.lot_cost
+            self.actual = self.group(self.lot_position, self.lot_value,
+                                     len(self.symbols))
+            self.change = self.actual - self.cost
+            self.account_value = self.group(self.lot_account, self.lot_value,
+                                            len(self.accounts))
+            self.account_change = self.account_value - self.account_cost
+            self.total = float(self.actual.sum())
+            self.total_change = float(self.change.sum())
+
+    @staticmethod
+    def group(index, values, count):
+        """
+        Sum values that share an index.
+
+        Args:
+            index (ndarray): Group of each value.
+            values (ndarray): The values.
+            count (int): Number of groups.
+
+        Returns:
+            ndarray: One sum per group, zero for groups without values.
+        """
+        return np.bincount(index, weights=values, minlength=count)
+
+
+def create_symbols(holdings):
+    """
+    Create SymbolData objects for each holding in the user's portfolio.
+
+    Builds every SymbolData concurrently in a bounded thread pool, so the
+    total load time follows the slowest symbol rather than the sum of all
+    of them. A symbol that fails to load is reported in the failures
+    dictionary instead of aborting the whole load.
+
+    Args:
+        holdings (dict): Mapping of "TICKER": [QUANTITY, VALUE] or to a
+        list of lots, which are combined per symbol.
+
+    Returns:
+        tuple: A list of SymbolData instances in holdings order, and a
+        dictionary mapping each failed symbol to its error message.
+    """
+    stocks = {}
+    failures = {}
+    if not holdings:
+        return [], failures
+    workers = min(MAX_FETCH_WORKERS, len(holdings))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(SymbolData, symbol, quantity, value): symbol
+            for symbol, (quantity, value) in Lots(holdings).positions().items()
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                stocks[symbol] = future.result()
+            except Exception as error:  # Report per symbol, keep loading
+                failures[symbol] = str(error) or type(error).__name__
+    # Keep the same order as the holdings file
+    return [stocks[symbol] for symbol in holdings if symbol in stocks], failures
+
+
+def record_session(stock_manager, currency_convert, directory):
+    """
+    Write the current bars, metadata and exchange rates to a directory.
+
+    Each symbol's bars go to "<SYMBOL>.csv", the currency and exchange
+    details to metadata.json and the exchange rate table to rates.json,
+    which is what load_recording reads back for a replay.
+
+    Args:
+        stock_manager (StockManager): The manager containing
+        all SymbolData objects.
+        currency_convert (CurrencyConvert): Source of exchange rates.
+        directory (str): The directory to write, created if needed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    metadata = {}
+    for symbol, stock in stock_manager.stocks.items():
+        stock.history.to_csv(os.path.join(directory, f"{symbol}.csv"),
+                             index_label="Datetime")
+        metadata[symbol] = {"currency": stock.currency,
+                            "minor_unit": stock.minor_unit,
+                            "exchange": stock.exchange,
+                            "timezone": stock.timezone}
+    with open(os.path.join(directory, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=4)
+    with open(os.path.join(directory, "rates.json"), "w") as f:
+        json.dump(currency_convert.rates, f, indent=4)
+
+
+def load_recording(directory):
+    """
+    Read a session written by record_session.
+
+    Args:
+        directory (str): The recording directory.
+
+    Returns:
+        tuple: A dictionary of symbol to DataFrame of bars, a dictionary
+        of symbol to metadata and a dictionary of exchange rates.
+    """
+    bars = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".csv"):
+            continue
+        history = pd.read_csv(os.path.join(directory, filename), index_col=0)
+        history.index = pd.to_datetime(history.index, utc=True)
+        bars[filename[:-len(".csv")]] = history.sort_index()
+    with open(os.path.join(directory, "metadata.json"), "r") as f:
+        metadata = json.load(f)
+    try:
+        with open(os.path.join(directory, "rates.json"), "r") as f:
+            rates = json.load(f)
+    except FileNotFoundError:
+        rates = {}
+    return bars, metadata, rates
+
+
+def create_replay_symbols(bars, metadata, holdings):
+    """
+    Create SymbolData objects from the first bar of each recording.
+
+    The remaining bars are left to a ReplayQuoteSource. Quantities and
+    values come from the holdings, symbols that are not held are
+    replayed with zero quantity.
+
+    Args:
+        bars (dict): Symbol to DataFrame of recorded bars.
+        metadata (dict): Symbol to recorded metadata.
+        holdings (dict): Mapping of "TICKER": [QUANTITY, VALUE] or to a
+        list of lots.
+
+    Returns:
+        tuple: A list of SymbolData instances, and a dictionary of
+        symbol to the bars still to be replayed.
+    """
+    stocks = []
+    remaining = {}
+    positions = Lots(holdings).positions()
+    for symbol, history in bars.items():
+        if history.empty or symbol not in metadata:
+            continue
+        quantity, value = positions.get(symbol, [0, 0])
+        stocks.append(SymbolData.from_history(symbol, quantity, value,
+                                              history.iloc[:1],
+                                              metadata[symbol]))
+        remaining[symbol] = history.iloc[1:]
+    return stocks, remaining
+
+
+class SymbolData():
+    """
+    Represents and fetches financial data for a single stock symbol.
+
+    On initialization, loads cached bars from HISTORY_CACHE and fetches
+    only the bars missing before and after them, or retrieves the full
+    historical price and volume data from Yahoo Finance, stores relevant
+    information such as open, close, high, low, and volume, and
+    determines the currency of the stock. Used as the data model for
+    each holding.
+
+    Bars are kept as contiguous NumPy columns in a slotted object, which
+    takes a fraction of the memory of a DataFrame with Series views.
+    A DataFrame is only built on demand through the history property.
+    The columns live in a RingBuffer capped by PERIOD and INTERVAL, and
+    bars older than PERIOD before the newest one are evicted, so a
+    long-running session holds one PERIOD of bars instead of growing.
+
+    Attributes:
+        symbol (str): The stock symbol.
+        quantity (float): Number of shares held.
+        value (float): Purchase value per share in local currency.
+        bars (RingBuffer): The bar columns listed below.
+        timestamps (ndarray): Bar times as int64 epoch seconds.
+        close (ndarray): Closing prices as float32.
+        open (ndarray): Opening prices as float32.
+        high (ndarray): High prices as float32.
+        low (ndarray): Low prices as float32.
+        volume (ndarray): Volume as int64.
+        first_index (int): Running index of the oldest bar held.
+        tz (str): Timezone of the bar timestamps.
+        currency (str): Currency of the stock, in its major unit.
+        minor_unit (int): Quoted prices per unit of currency, e.g. 100
+            for stocks quoted in pence.
+        exchange (str): Name of the exchange.
+        timezone (str): Timezone of the exchange.
+        stock (Ticker): yfinance ticker reused for incremental refreshes.
+        fetched (float): Time of the last fetch that returned bars, or
+            of the newest cached bar until one does.
+        indicators (IndicatorEngine): SMA, EMA, VWAP, Bollinger bands and
+            RSI, kept up to date with the bars.
+    """
+    __slots__ = ("symbol", "quantity", "value", "bars", "tz", "currency",
+                 "minor_unit", "exchange", "timezone", "stock", "fetched",
+                 "indicators")
+    # Column dtypes: timestamps, open, high, low, close, volume
+    DTYPES = (np.int64, np.float32, np.float32, np.float32, np.float32,
+              np.int64)
+    # Serializes bar writes from refresh workers and quote streams
+    WRITE_LOCK = threading.Lock()
+
+    def __init__(self, symbol, quantity, value):
+        self.symbol = symbol
+        self.quantity = quantity
+        self.value = value
+        self.stock = GATEWAY.ticker(self.symbol)
+        interval = get_settings().INTERVAL
+        cached, covered = HISTORY_CACHE.load(self.symbol, interval)
+        if cached is not None:
+            # Warm start, only the bars PERIOD reaches before the cached
+            # ones and the bars after them are fetched
+            self.set_history(cached)
+            self.fetched = float(self.timestamps[-1])  # Until bars arrive
+            try:
+                self.fetch_head(covered)
+                self.refresh()
+            except Exception as error:  # E.g. offline, keep the cache
+                METRICS.count("stale_starts")
+                logger.warning("%s: starting from cached bars: %s",
+                               self.symbol, error)
+            self.trim_to_period(get_settings().PERIOD)
+        else:
+            with METRICS.timer("fetch", self.symbol):
+                history = GATEWAY.history(   # Get historical data
+                    self.symbol,
+                    period=get_settings().PERIOD,
+                    interval=interval
+                    )
+            if history.empty:
+                raise ValueError(
+                    f"No price data returned for {self.symbol}")
+            self.set_history(history)
+            self.fetched = time.time()
+            HISTORY_CACHE.store(self.symbol, interval, history)
+            seconds = PERIOD_SECONDS.get(get_settings().PERIOD)
+            HISTORY_CACHE.cover(  # Every bar of the period was returned
+                self.symbol, interval, 0 if seconds is None else
+                min(int(self.timestamps[0]), int(self.fetched) - seconds))
+        metadata = METADATA_CACHE.get(self.symbol, self.stock)
+        self.currency = metadata["currency"]  # Currency of the stock
+        self.minor_unit = metadata["minor_unit"]  # E.g. 100 for pence
+        self.exchange = metadata["exchange"]  # Exchange name
+        self.timezone = metadata["timezone"]  # Exchange timezone
+
+    @classmethod
+    def from_history(cls, symbol, quantity, value, history, metadata):
+        """
+        Create a SymbolData from known bars without any network access.
+
+        Args:
+            symbol (str): The stock symbol.
+            quantity (float): Number of shares held.
+            value (float): Purchase value per share in local currency.
+            history (DataFrame): Bars indexed by time.
+            metadata (dict): currency, minor_unit, exchange and timezone.
+
+        Returns:
+            SymbolData: The new instance, which has no ticker to refresh.
+        """
+        self = cls.__new__(cls)
+        self.symbol = symbol
+        self.quantity = quantity
+        self.value = value
+        self.stock = None
+        self.set_history(history)
+        self.fetched = time.time()
+        self.currency = metadata["currency"]
+        self.minor_unit = metadata["minor_unit"]
+        self.exchange = metadata["exchange"]
+        self.timezone = metadata["timezone"]
+        return self
+
+    @property
+    def timestamps(self):
+        """Bar times as int64 epoch seconds."""
+        return self.bars.columns()[0]
+
+    @property
+    def open(self):
+        """Opening prices."""
+        return self.bars.columns()[1]
+
+    @property
+    def high(self):
+        """High prices."""
+        return self.bars.columns()[2]
+
+    @property
+    def low(self):
+        """Low prices."""
+        return self.bars.columns()[3]
+
+    @property
+    def close(self):
+        """Closing prices."""
+        return self.bars.columns()[4]
+
+    @property
+    def volume(self):
+        """Volume data."""
+        return self.bars.columns()[5]
+
+    @property
+    def first_index(self):
+        """Running index of the oldest bar held, grows with evictions."""
+        return self.bars.appended - len(self.bars)
+
+    @property
+    def datetime(self):
+        """
+        Bar positions for the plot x-axis.
+
+        Returns:
+            ndarray: 0 to the number of bars - 1.
+        """
+        return np.arange(len(self.close))
+
+    @property
+    def history(self):
+        """
+        Build a DataFrame of the bars, indexed by time.
+
+        Returns:
+            DataFrame: Open, High, Low, Close and Volume columns.
+        """
+        index = pd.to_datetime(self.timestamps, unit="s", utc=True)
+        return pd.DataFrame({"Open": self.open, "High": self.high,
+                             "Low": self.low, "Close": self.close,
+                             "Volume": self.volume},
+                            index=index.tz_convert(self.tz))
+
+    def last_price(self):
+        """
+        Return the last closing price in the currency's major unit.
+
+        Returns:
+            float: The last close divided by the minor unit.
+        """
+        return float(self.close[-1]) / self.minor_unit
+
+    @staticmethod
+    def columns(history):
+        """
+        Convert a DataFrame of bars to compact NumPy columns.
+
+        Args:
+            history (DataFrame): Bars indexed by time.
+
+        Returns:
+            tuple: timestamps, open, high, low, close and volume arrays.
+        """
+        return (history.index.as_unit("s").asi8.astype(np.int64),
+                history["Open"].to_numpy(dtype=np.float32),
+                history["High"].to_numpy(dtype=np.float32),
+                history["Low"].to_numpy(dtype=np.float32),
+                history["Close"].to_numpy(dtype=np.float32),
+                history["Volume"].fillna(0).to_numpy(dtype=np.int64))
+
+    def set_columns(self, columns):
+        """
+        Store timestamps, open, high, low, close and volume arrays.
+
+        Replaces the ring buffer with one sized for the current PERIOD
+        and INTERVAL, and recomputes the indicators over the new bars.
+
+        Args:
+            columns (tuple): The arrays, in that order.
+        """
+        settings = get_settings()
+        capacity = history_capacity(settings.PERIOD, settings.INTERVAL)
+        self.bars = RingBuffer(capacity, self.DTYPES,
+                               initial=len(columns[0]))
+        self.bars.extend(columns)
+        offset = pd.Timestamp.now(tz=self.tz).utcoffset()
+        self.indicators = IndicatorEngine(
+            int(offset.total_seconds()) if offset else 0)
+        self.indicators.reset(self.bars.columns())
+
+    def replace_last_bar(self, bar):
+        """
+        Overwrite the newest bar and update the indicators, if it differs.
+
+        Args:
+            bar (tuple): Timestamp, open, high, low, close and volume.
+
+        Returns:
+            bool: True if the bar changed.
+        """
+        last = [column[-1] for column in self.bars.columns()]
+        if all(old == new for old, new in zip(last, bar)):
+            return False
+        self.bars.replace_last(bar)
+        self.indicators.replace_last(bar)
+        return True
+
+    def extend_bars(self, columns):
+        """
+        Append bars and advance the indicators.
+
+        Bars older than PERIOD before the newest bar are evicted, like
+        trim_to_period does, so a long session holds one PERIOD of
+        trading rather than the wall-clock capacity of the buffer.
+
+        Args:
+            columns (tuple): One sequence of new values per column.
+        """
+        self.bars.extend(columns)
+        self.indicators.extend(columns)
+        seconds = PERIOD_SECONDS.get(get_settings().PERIOD)
+        if seconds is not None:
+            timestamps = self.timestamps
+            expired = np.searchsorted(timestamps, timestamps[-1] - seconds,
+                                      side="right")
+            if expired:
+                self.bars.discard(expired)
+
+    def set_history(self, history):
+        """
+        Store a price history as compact NumPy columns.
+
+        Args:
+            history (DataFrame): Historical price data indexed by time.
+        """
+        self.tz = str(history.index.tz or "UTC")
+        self.set_columns(self.columns(history))
+
+    def fetch_head(self, covered):
+        """
+        Fetch the bars PERIOD reaches back to before the cached ones.
+
+        Needed when PERIOD grew since the bars were cached, e.g. from
+        "1d" to "5d". The period is measured from the newest bar, like
+        trim_to_period.
+
+        Args:
+            covered (int): Epoch seconds from which every bar is cached,
+                or None if unknown.
+        """
+        interval = get_settings().INTERVAL
+        seconds = PERIOD_SECONDS.get(get_settings().PERIOD)
+        start = 0 if seconds is None else int(self.timestamps[-1]) - seconds
+        if covered is not None and covered <= start:
+            return
+        end = pd.Timestamp(covered or int(self.timestamps[0]), unit="s",
+                           tz="UTC")
+        if seconds is None:  # "max" has no start to ask for
+            request = {"period": "max"}
+        else:
+            request = {"start": pd.Timestamp(start, unit="s", tz="UTC")}
+        with METRICS.timer("fetch", self.symbol):
+            head = GATEWAY.history(self.symbol, end=end, interval=interval,
+                                   **request)
+        if not head.empty:
+            head.index = head.index.tz_convert(self.tz)
+            history = pd.concat([head[["Open", "High", "Low", "Close",
+                                       "Volume"]], self.history])
+            history = history[~history.index.duplicated(keep="last")]
+            self.set_history(history.sort_index())
+            HISTORY_CACHE.store(self.symbol, interval, head)
+        HISTORY_CACHE.cover(self.symbol, interval, start)
+
+    def refresh(self):
+        """
+        Fetch only the bars after the last stored timestamp.
+
+        The last stored bar is usually still forming, so it is requested
+        again and replaced by the fresh copy. Newer bars are appended.
+        Ticks may open bars while the request is in flight, so the
+        response is merged against the newest bar at that point.
+
+        Returns:
+            bool: True if the bars changed.
+        """
+        last = pd.Timestamp(int(self.timestamps[-1]), unit="s", tz="UTC")
+        with METRICS.timer("fetch", self.symbol):
+            new = GATEWAY.history(self.symbol, start=last,
+                                  interval=get_settings().INTERVAL)
+        new = new[new.index >= last]
+        if new.empty:
+            return False
+        self.fetched = time.time()
+        columns = self.columns(new)
+        with self.WRITE_LOCK:
+            changed = False
+            newest = self.timestamps[-1]
+            skip = np.searchsorted(columns[0], newest)  # Already replaced
+            columns = tuple(column[skip:] for column in columns)
+            if len(columns[0]) and columns[0][0] == newest:  # Forming bar
+                changed = self.replace_last_bar([column[0]
+                                                 for column in columns])
+                columns = tuple(column[1:] for column in columns)
+            if len(columns[0]):
+                self.extend_bars(columns)  # Evicts the oldest bars once full
+                changed = True
+        if changed:
+            HISTORY_CACHE.store(self.symbol, get_settings().INTERVAL, new)
+        return changed
+
+    def apply_tick(self, price, timestamp, volume=0):
+        """
+        Merge a live trade price into the bars.
+
+        A trade within the last bar's interval updates its close, high,
+        low and volume in place. A later trade starts a new bar.
+
+        Args:
+            price (float): The traded price, in quote units.
+            timestamp (int): Time of the trade in epoch seconds.
+            volume (int): Volume to add to the bar.
+
+        Returns:
+            bool: True if the bars changed.
+        """
+        interval = INTERVAL_SECONDS.get(get_settings().INTERVAL, 60)
+        with self.WRITE_LOCK:
+            last = int(self.timestamps[-1])
+            if timestamp < last:  # Older than the last bar, ignore
+                return False
+            if timestamp < last + interval:
+                high = max(float(self.high[-1]), price)
+                low = min(float(self.low[-1]), price)
+                return self.replace_last_bar((last, self.open[-1], high, low,
+                                              price, self.volume[-1] + volume))
+            start = last + (timestamp - last) // interval * interval
+            self.extend_bars(([start], [price], [price], [price],
+                              [price], [volume]))
+            return True
+
+    def apply_bar(self, timestamp, open, high, low, close, volume):
+        """
+        Replace the last bar or append a newer one.
+
+        Args:
+            timestamp (int): Start of the bar in epoch seconds.
+            open (float): Opening price.
+            high (float): High price.
+            low (float): Low price.
+            close (float): Closing price.
+            volume (int): Volume.
+
+        Returns:
+            bool: True if the bars changed.
+        """
+        bar = (timestamp, open, high, low, close, volume)
+        with self.WRITE_LOCK:
+            last = int(self.timestamps[-1])
+            if timestamp == last:
+                return self.replace_last_bar(bar)
+            if timestamp < last:
+                return False
+            self.extend_bars(tuple([value] for value in bar))
+            return True
+
+    def trim_to_period(self, period):
+        """
+        Drop bars that are older than PERIOD before the newest bar.
+
+        Measured from the newest bar rather than from now, so a cache
+        saved before a weekend still yields the last trading session.
+
+        Args:
+            period (str): A yfinance period string such as "5d".
+        """
+        seconds = PERIOD_SECONDS.get(period)
+        if seconds is None:  # "max" keeps everything
+            return
+        first = np.searchsorted(self.timestamps,
+                                self.timestamps[-1] - seconds, side="right")
+        self.set_columns(tuple(column[first:]
+                               for column in self.bars.columns()))
+
+    def __repr__(self):
+        """
+        Return a string representation of the SymbolData object for debugging.
+
+        Returns:
+            str: Debug string with symbol, quantity, and price.
+        """
+        return (f'Stock({self.symbol!r}), '
+                f'Quant({self.quantity!r}), '
+                f'Price({self.value!r})'
+                )
@@ -0,0 +1,198 @@
+# Import necessary libraries
+import sys
+import csv
+import json
+import time
+import signal
+import argparse
+import logging  # For failures and metrics
+import numpy as np  # For rounding the snapshot values
+from Core import (
+    METRICS, METRICS_LOG, CurrencyConvert, Lots, PortfolioValuation,
+    StockManager, create_quote_source, create_symbols, get_settings,
+    load_holdings, logger
+)  # Data and valuation pipeline, without Textual
+
+
+SNAPSHOT_FIELDS = ("time", "symbol", "currency", "price", "close", "value",
+                   "change", "account")  # CSV columns, one row per symbol
+
+
+def snapshot(valuation, stock_manager):
+    """
+    Capture the current valuation as one portfolio snapshot.
+
+    Args:
+        valuation (PortfolioValuation): An updated valuation.
+        stock_manager (StockManager): The manager containing
+        all SymbolData objects.
+
+    Returns:
+        dict: Time, local currency, totals, per-symbol price (in the
+        symbol's own currency), close and value (in local currency) and
+        change from purchase value, and value and change per account.
+    """
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 4)
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "currency": get_settings().LOCAL_CURRENCY,
+        "total": number(valuation.total),
+        "total_change": number(valuation.total_change),
+        "symbols": [
+            {"symbol": symbol,
+             "currency": stock_manager[symbol].currency,
+             "price": number(valuation.price[i]),
+             "close": number(valuation.close[i]),
+             "value": number(valuation.actual[i]),
+             "change": number(valuation.change[i])}
+            for i, symbol in enumerate(valuation.symbols)
+        ],
+        "accounts": [
+            {"account": account,
+             "value": number(valuation.account_value[i]),
+             "change": number(valuation.account_change[i])}
+            for i, account in enumerate(valuation.accounts)
+        ],
+    }
+
+
+class SnapshotWriter:
+    """
+    Appends portfolio snapshots to a file or stdout as JSONL or CSV.
+
+    JSONL writes one snapshot per line. CSV writes one row per symbol,
+    an "ACCOUNT" row per account and a "TOTAL" row per snapshot, with
+    the header only at the start of a new file.
+
+    Args:
+        stream (file): Open text stream to write to.
+        format (str): "jsonl" or "csv".
+    """
+
+    def __init__(self, stream, format="jsonl"):
+        self.stream = stream
+        self.format = format
+        if format == "csv":
+            self.writer = csv.DictWriter(stream, SNAPSHOT_FIELDS)
+            if not stream.seekable() or stream.tell() == 0:
+                self.writer.writeheader()
+
+    def write(self, snapshot):
+        """
+        Write one snapshot and flush it, so readers see it at once.
+
+        Args:
+            snapshot (dict): A snapshot as returned by snapshot().
+        """
+        if self.format == "csv":
+            for row in snapshot["symbols"]:
+                self.writer.writerow({"time": snapshot["time"], **row})
+            for row in snapshot["accounts"]:
+                self.writer.writerow({"time": snapshot["time"],
+                                      "symbol": "ACCOUNT",
+                                      "currency": snapshot["currency"],
+                                      **row})
+            self.writer.writerow({"time": snapshot["time"],
+                                  "symbol": "TOTAL",
+                                  "currency": snapshot["currency"],
+                                  "value": snapshot["total"],
+                                  "change": snapshot["total_change"]})
+        else:
+            self.stream.write(json.dumps(snapshot) + "\n")
+        self.stream.flush()
+
+
+def run(writer, holdings, interval=None, count=None):
+    """
+    Load the holdings and write a snapshot after every fetch cycle.
+
+    Runs the same pipeline as SymbolWatcher: SymbolData for each holding,
+    the quote source from the QUOTE_SOURCE setting, CurrencyConvert and
+    PortfolioValuation.
+
+    Args:
+        writer (SnapshotWriter): Where the snapshots go.
+        holdings (dict): Mapping of "TICKER": [QUANTITY, VALUE] or to a
+        list of lots.
+        interval (float): Seconds between snapshots. Defaults to the
+        UPDATE_INTERVAL setting.
+        count (int): Stop after this many snapshots. Runs until
+        interrupted by default.
+    """
+    settings = get_settings()
+    if interval is None:
+        interval = settings.UPDATE_INTERVAL
+    stock_manager = StockManager(create_quote_source(settings.QUOTE_SOURCE))
+    symbols, failures = create_symbols(holdings)
+    for symbol, error in failures.items():
+        logger.warning("Could not load %s: %s", symbol, error)
+    stock_manager.replace(symbols)
+    currency_convert = CurrencyConvert(stock_manager)
+    currency_convert.start()  # Load and keep refreshing FX rates
+    valuation = PortfolioValuation(stock_manager, currency_convert,
+                                   Lots(holdings))
+    # Streamed quotes land in the bars, the next snapshot picks them up
+    stock_manager.source.start(stock_manager, lambda symbols: None)
+    written = 0
+    try:
+        while True:
+            valuation.update()
+            writer.write(snapshot(valuation, stock_manager))
+            written += 1
+            if count is not None and written >= count:
+                break
+            time.sleep(interval)
+            with METRICS.timer("fetch_cycle"):
+                _, failures = stock_manager.poll()
+            for symbol, error in failures.items():
+                logger.warning("Could not refresh %s: %s", symbol, error)
+    finally:
+        currency_convert.stop()
+        stock_manager.source.stop()
+        for line in METRICS.lines():
+            logger.info(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write portfolio snapshots without the terminal UI.")
+    parser.add_argument("--output", default="-",
+                        help="file to append snapshots to, - for stdout")
+    parser.add_argument("--format", choices=("jsonl", "csv"),
+                        default="jsonl", help="snapshot format")
+    parser.add_argument("--interval", type=float,
+                        help="seconds between snapshots "
+                        "(default UPDATE_INTERVAL)")
+    parser.add_argument("--count", type=int,
+                        help="stop after this many snapshots")
+    parser.add_argument("--holdings", default="holdings.json",
+                        help="holdings file")
+    args = parser.parse_args()
+
+    # Warnings and metrics go to the log, stdout may carry the snapshots
+    logging.basicConfig(filename=METRICS_LOG, level=logging.INFO,
+                        format="%(asctime)s %(message)s")
+    # Stop cleanly on SIGTERM as well as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    holdings = load_holdings(args.holdings)
+    if not holdings:
+        sys.exit(f"No holdings found in {args.holdings}")
+    if args.output == "-":
+        stream = sys.stdout
+    else:
+        stream = open(args.output, "a", newline="")
+    try:
+        run(SnapshotWriter(stream, args.format), holdings,
+            args.interval, args.count)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Deterministic local stand-in for the parts of yfinance used by Core.py.
+
+Every symbol gets a synthetic random walk seeded from its name, so runs
+are repeatable and never touch the network. Setting FAULT_RATE makes
+that share of requests fail with a rate limit error, to exercise the
+retries of the fetch gateway. Assign the module to Core.yf to use it:
+
+    import Core, fake_yfinance
+    Core.yf = fake_yfinance
+"""
+import random
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+from yfinance import exceptions  # Raised like the real yfinance does
+
+BARS = 390  # Bars served per history, one trading day of 1m bars
+# Currency by symbol suffix, anything else trades in USD
+SUFFIX_CURRENCY = {".ST": "SEK", ".L": "GBp", ".DE": "EUR", ".T": "JPY"}
+# Units per USD served for "<CURRENCY>=X" tickers
+FX_RATES = {"SEK": 10.5, "GBP": 0.79, "EUR": 0.92, "JPY": 150.0}
+INTERVAL_FREQ = {
+    "1m": "1min", "2m": "2min", "5m": "5min", "15m": "15min",
+    "30m": "30min", "60m": "60min", "90m": "90min", "1h": "1h",
+    "1d": "1D", "5d": "5D", "1wk": "7D", "1mo": "31D", "3mo": "92D",
+}
+CALLS = {"history": 0, "info": 0, "download": 0, "faults": 0}
+FAULT_RATE = 0.0  # Share of requests that fail with a rate limit error
+FAULTS = random.Random(0)  # Seeded, so the same requests fail every run
+FAULTS_LOCK = threading.Lock()
+
+
+def request(kind):
+    """
+    Count a served request and fail it at FAULT_RATE.
+
+    Args:
+        kind (str): "history", "info" or "download".
+
+    Raises:
+        YFRateLimitError: For the injected failures.
+    """
+    with FAULTS_LOCK:
+        CALLS[kind] += 1
+        failed = FAULTS.random() < FAULT_RATE
+        if failed:
+            CALLS["faults"] += 1
+    if failed:
+        raise exceptions.YFRateLimitError()
+
+
+def currency_of(symbol):
+    """
+    Return the currency a synthetic symbol is quoted in.
+
+    Args:
+        symbol (str): The stock symbol.
+
+    Returns:
+        str: The currency code, "GBp" for pence.
+    """
+    for suffix, currency in SUFFIX_CURRENCY.items():
+        if symbol.endswith(suffix):
+            return currency
+    return "USD"
+
+
+class Ticker:
+    """
+    Serves synthetic bars, metadata and info for one symbol.
+
+    Args:
+        symbol (str): The stock symbol, or "<CURRENCY>=X" for a rate.
+    """
+
+    def __init__(self, symbol, session=None):
+        self.ticker = symbol
+        self.seed = zlib.crc32(symbol.encode())  # Stable across runs
+
+    def history(self, period="1mo", interval="1d", start=None, **kwargs):
+        """
+        Return BARS bars ending at the current interval.
+
+        Args:
+            period (str): Ignored, the length is always BARS.
+            interval (str): Bar length.
+            start (datetime): Drop bars before this time when given.
+
+        Returns:
+            DataFrame: Open, High, Low, Close and Volume indexed by time.
+        """
+        request("history")
+        return self.bars(interval, start)
+
+    def bars(self, interval="1m", start=None):
+        """
+        Build the synthetic bars without counting a request.
+
+        Args:
+            interval (str): Bar length.
+            start (datetime): Drop bars before this time when given.
+
+        Returns:
+            DataFrame: Open, High, Low, Close and Volume indexed by time.
+        """
+        freq = INTERVAL_FREQ.get(interval, "1min")
+        end = pd.Timestamp.now(tz="UTC").floor(freq)
+        index = pd.date_range(end=end, periods=BARS, freq=freq)
+        rng = np.random.default_rng(self.seed)
+        if self.ticker.endswith("=X"):
+            close = np.full(BARS, FX_RATES.get(self.ticker[:-2], 1.0))
+        else:
+            close = 100 + rng.standard_normal(BARS).cumsum()
+        history = pd.DataFrame({"Open": close, "High": close + 0.5,
+                                "Low": close - 0.5, "Close": close,
+                                "Volume": rng.integers(0, 10_000, BARS)},
+                               index=index)
+        if start is not None:
+            history = history[history.index >= pd.Timestamp(start)]
+        return history
+
+    def get_history_metadata(self):
+        """
+        Return the metadata that accompanies a history request.
+
+        Returns:
+            dict: currency, exchangeName and exchangeTimezoneName.
+        """
+        return {"currency": currency_of(self.ticker),
+                "exchangeName": "FAKE",
+                "exchangeTimezoneName": "America/New_York"}
+
+    @property
+    def info(self):
+        request("info")
+        return {"currency": currency_of(self.ticker), "exchange": "FAKE",
+                "exchangeTimezoneName": "America/New_York"}
+
+
+def download(tickers, period=None, interval="1m", group_by=None,
+             progress=True, **kwargs):
+    """
+    Return the histories of several tickers grouped by ticker.
+
+    Args:
+        tickers (list): The symbols to download.
+        interval (str): Bar length.
+
+    Returns:
+        DataFrame: Columns keyed by (ticker, field).
+    """
+    request("download")
+    frames = {ticker: Ticker(ticker).bars(interval)
+              for ticker in tickers}
+    return pd.concat(frames, axis=1)
@@ -0,0 +1,416 @@
+"""
+Benchmarks for Symbol Watcher 3 against a deterministic fake yfinance.
+
+Measures app startup for 10, 100 and 1000 holdings, the per-tick cost
+of updating the portfolio overview, valuing 10k tax lots,
+CurrencyConvert throughput, loading through the fetch gateway while
+requests are rate limited, and SymbolTicker mount, line plot and
+candlestick plot time. Nothing touches the network and the caches live
+in a temporary directory, so results are comparable between runs.
+Results are written as JSON, one record per benchmark with the min,
+median, mean and max of the repeated runs:
+
+    python benchmarks/run_benchmarks.py --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # The repository root
+sys.path.insert(0, HERE)
+
+import App  # noqa: E402
+import Core  # noqa: E402
+import fake_yfinance  # noqa: E402
+
+Core.yf = fake_yfinance  # Every yfinance call is served locally
+
+STARTUP_SIZES = (10, 100, 1000)  # Holdings per startup benchmark
+TICK_HOLDINGS = 100  # Holdings shown while measuring ticks
+TICKS = 500  # Ticks per tick benchmark run
+FX_HOLDINGS = 1000  # Symbols converted per throughput run
+LOTS = 10_000  # Tax lots valued per valuation run, over FX_HOLDINGS
+LOT_ACCOUNTS = 20  # Accounts the lots are spread over
+VALUATIONS = 100  # Valuation updates per valuation run
+PLOT_HOLDINGS = 10  # SymbolTickers mounted per plot benchmark run
+DEFAULT_OUTPUT = "benchmark_results.json"  # Relative to the current directory
+GATEWAY_HOLDINGS = 100  # Holdings loaded per fault injection run
+FAULT_RATE = 0.2  # Share of requests failed in the fault injection run
+RETRY_BACKOFF = 0.01  # Seconds before the first retry in the benchmarks
+UNTHROTTLED = 1e9  # Token bucket rate and burst that never wait
+SCREEN_SIZE = (200, 60)  # Terminal size of the headless app
+SETTINGS = {
+    "PERIOD": "1d",
+    "INTERVAL": "1m",
+    "UPDATE_INTERVAL": 3600,  # Keep the poll timer out of the timings
+    "LOCAL_CURRENCY": "SEK",
+    "QUOTE_SOURCE": "poll",
+}
+SUFFIXES = ("", ".ST", ".L", ".DE", ".T")  # Spread over five currencies
+
+
+def make_holdings(count):
+    """
+    Create synthetic holdings spread over several currencies.
+
+    Args:
+        count (int): Number of holdings.
+
+    Returns:
+        dict: Mapping of "TICKER": [QUANTITY, VALUE].
+    """
+    return {f"SYM{i:04d}{SUFFIXES[i % len(SUFFIXES)]}": [i % 50, 100.0]
+            for i in range(count)}
+
+
+def make_lots(count, symbols, accounts):
+    """
+    Create synthetic tax lots spread over symbols and accounts.
+
+    Args:
+        count (int): Number of lots.
+        symbols (int): Number of symbols, as in make_holdings.
+        accounts (int): Number of accounts.
+
+    Returns:
+        dict: Mapping of "TICKER" to a list of lots.
+    """
+    names = list(make_holdings(symbols))
+    holdings = {symbol: [] for symbol in names}
+    for i in range(count):
+        holdings[names[i % symbols]].append({
+            "account": f"ACC{i % accounts:02d}",
+            "quantity": i % 50 + 1,
+            "cost": 100.0 * (i % 50 + 1),
+            "date": f"20{10 + i % 15}-01-01",
+        })
+    return holdings
+
+
+def reset_state(fault_rate=0.0):
+    """
+    Point Core at fresh, empty caches and reread the settings.
+
+    The fetch gateway is replaced by one without a rate limit, so the
+    benchmarks time the pipeline rather than the throttling.
+
+    Args:
+        fault_rate (float): Share of fake requests that are rate limited.
+    """
+    fake_yfinance.FAULT_RATE = fault_rate
+    fake_yfinance.FAULTS.seed(0)
+    Core.GATEWAY = Core.FetchGateway(rate=UNTHROTTLED, burst=UNTHROTTLED,
+                                     backoff=RETRY_BACKOFF)
+    Core._settings = None
+    Core.HISTORY_CACHE = Core.HistoryCache()
+    Core.METADATA_CACHE = Core.MetadataCache()
+    for filename in (Core.CACHE_FILE, Core.METADATA_FILE):
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def summarize(name, samples, unit, **params):
+    """
+    Reduce repeated samples to one result record.
+
+    Args:
+        name (str): Benchmark name.
+        samples (list): One measurement per repeat.
+        unit (str): Unit of the samples.
+        **params: Parameters of the benchmark, e.g. holdings=100.
+
+    Returns:
+        dict: The result record.
+    """
+    return {
+        "name": name,
+        "params": params,
+        "unit": unit,
+        "repeat": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+async def bench_startup(count, warm):
+    """
+    Time from creating the app until the holdings are shown.
+
+    Args:
+        count (int): Number of holdings.
+        warm (bool): Start from the history cache of a previous run.
+
+    Returns:
+        float: Seconds until every holding is loaded and composed.
+    """
+    holdings = make_holdings(count)
+    reset_state()
+    if warm:  # Fill the caches with a first, untimed run
+        Core.create_symbols(holdings)
+        Core._settings = None
+    start = time.perf_counter()
+    app = App.SymbolWatcher(holdings=holdings)
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        elapsed = time.perf_counter() - start
+        app.currency_convert.stop()
+    return elapsed
+
+
+async def bench_ticks(count, ticks):
+    """
+    Time applying one price tick and updating the portfolio overview.
+
+    This is the work done per symbol update: the tick is written into
+    the bars, the valuation recomputed and the overview labels whose
+    text changed rewritten.
+
+    Args:
+        count (int): Number of holdings.
+        ticks (int): Number of ticks to apply.
+
+    Returns:
+        float: Mean seconds per tick.
+    """
+    reset_state()
+    app = App.SymbolWatcher(holdings=make_holdings(count))
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        overview = app.query_one(App.PortfolioOverview)
+        symbols = list(app.stock_manager.stocks)
+        start = time.perf_counter()
+        for i in range(ticks):
+            symbol = symbols[i % len(symbols)]
+            stock = app.stock_manager[symbol]
+            app.stock_manager.apply_tick(symbol, float(stock.close[-1]) + 0.01,
+                                         int(stock.timestamps[-1]))
+            app.valuation.update()
+            overview.on_prices_updated(App.PricesUpdated(
+                frozenset({symbol}), app.valuation.changed))
+        elapsed = time.perf_counter() - start
+        app.currency_convert.stop()
+    return elapsed / ticks
+
+
+def bench_currency(count):
+    """
+    Time CurrencyConvert refreshing its rates and converting prices.
+
+    Args:
+        count (int): Number of symbols to convert.
+
+    Returns:
+        tuple: Seconds per refresh_rates call and conversions per second.
+    """
+    reset_state()
+    stocks, _ = Core.create_symbols(make_holdings(count))
+    stock_manager = Core.StockManager()
+    stock_manager.replace(stocks)
+    currency_convert = Core.CurrencyConvert(stock_manager)
+    start = time.perf_counter()
+    currency_convert.refresh_rates()
+    refresh = time.perf_counter() - start
+    start = time.perf_counter()
+    for symbol in stock_manager.stocks:
+        currency_convert.convert_to_local_currency(symbol)
+    elapsed = time.perf_counter() - start
+    return refresh, count / elapsed
+
+
+def bench_valuation(count, symbols, accounts, updates):
+    """
+    Time valuing tax lots and aggregating them per symbol and account.
+
+    Args:
+        count (int): Number of lots.
+        symbols (int): Number of symbols the lots are in.
+        accounts (int): Number of accounts the lots are in.
+        updates (int): Number of valuation updates.
+
+    Returns:
+        tuple: Mean seconds per PortfolioValuation.update call when
+        every symbol ticked before it, and when no symbol changed.
+    """
+    reset_state()
+    holdings = make_lots(count, symbols, accounts)
+    stocks, _ = Core.create_symbols(holdings)
+    stock_manager = Core.StockManager()
+    stock_manager.replace(stocks)
+    currency_convert = Core.CurrencyConvert(stock_manager)
+    currency_convert.refresh_rates()
+    valuation = Core.PortfolioValuation(stock_manager, currency_convert,
+                                        Core.Lots(holdings))
+    valuation.update()
+    full = 0.0
+    for update in range(updates):
+        move = 1.001 if update % 2 else 0.999  # Every price moves
+        for stock in stocks:
+            stock_manager.apply_tick(stock.symbol,
+                                     float(stock.close[-1]) * move,
+                                     int(stock.timestamps[-1]))
+        start = time.perf_counter()
+        valuation.update()
+        full += time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(updates):
+        valuation.update()
+    quiet = time.perf_counter() - start
+    return full / updates, quiet / updates
+
+
+def bench_gateway(count, fault_rate):
+    """
+    Load holdings while the fake provider rate limits some requests.
+
+    Args:
+        count (int): Number of holdings.
+        fault_rate (float): Share of requests that fail.
+
+    Returns:
+        tuple: Seconds to load, retries made and symbols that failed
+        to load despite the retries.
+    """
+    reset_state(fault_rate)
+    retried = Core.METRICS.counters.get("fetch_retries", 0)
+    start = time.perf_counter()
+    _, failures = Core.create_symbols(make_holdings(count))
+    elapsed = time.perf_counter() - start
+    retries = Core.METRICS.counters.get("fetch_retries", 0) - retried
+    fake_yfinance.FAULT_RATE = 0.0
+    return elapsed, retries, len(failures)
+
+
+async def bench_plots(count):
+    """
+    Time mounting a SymbolTicker per holding and replotting them.
+
+    Args:
+        count (int): Number of holdings.
+
+    Returns:
+        tuple: Seconds to mount and draw every ticker, and mean seconds
+        per plot_history and per plot_candles call.
+    """
+    reset_state()
+    app = App.SymbolWatcher(holdings=make_holdings(count))
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        start = time.perf_counter()
+        app.action_add_symbols()
+        await pilot.pause()
+        await pilot.pause()  # Plots are drawn after the first refresh
+        mount = time.perf_counter() - start
+        tickers = list(app.query(App.SymbolTicker))
+        start = time.perf_counter()
+        for ticker in tickers:
+            ticker.plot_history()
+        plot = (time.perf_counter() - start) / len(tickers)
+        start = time.perf_counter()
+        for ticker in tickers:
+            ticker.plot_candles()
+        candles = (time.perf_counter() - start) / len(tickers)
+        app.currency_convert.stop()
+    return mount, plot, candles
+
+
+def run(repeat, sizes):
+    """
+    Run every benchmark in the current directory.
+
+    Args:
+        repeat (int): Number of runs per benchmark.
+        sizes (tuple): Holdings counts for the startup benchmarks.
+
+    Returns:
+        list: One result record per benchmark.
+    """
+    with open(Core.SETTINGS_FILE, "w") as f:
+        json.dump(SETTINGS, f)
+    results = []
+    for count in sizes:
+        for warm in (False, True):
+            samples = [asyncio.run(bench_startup(count, warm))
+                       for _ in range(repeat)]
+            results.append(summarize("startup", samples, "s",
+                                     holdings=count, warm=warm))
+    samples = [asyncio.run(bench_ticks(TICK_HOLDINGS, TICKS))
+               for _ in range(repeat)]
+    results.append(summarize("overview_tick", samples, "s",
+                             holdings=TICK_HOLDINGS, ticks=TICKS))
+    full, quiet = zip(*(bench_valuation(LOTS, FX_HOLDINGS, LOT_ACCOUNTS,
+                                        VALUATIONS)
+                        for _ in range(repeat)))
+    results.append(summarize("valuation_update", full, "s", lots=LOTS,
+                             holdings=FX_HOLDINGS, accounts=LOT_ACCOUNTS))
+    results.append(summarize("valuation_update_quiet", quiet, "s", lots=LOTS,
+                             holdings=FX_HOLDINGS, accounts=LOT_ACCOUNTS))
+    refresh, throughput = zip(*(bench_currency(FX_HOLDINGS)
+                                for _ in range(repeat)))
+    results.append(summarize("currency_refresh_rates", refresh, "s",
+                             holdings=FX_HOLDINGS))
+    results.append(summarize("currency_conversions", throughput,
+                             "conversions/s", holdings=FX_HOLDINGS))
+    elapsed, retries, failed = zip(*(bench_gateway(GATEWAY_HOLDINGS,
+                                                   FAULT_RATE)
+                                     for _ in range(repeat)))
+    results.append(summarize("gateway_load", elapsed, "s",
+                             holdings=GATEWAY_HOLDINGS, fault_rate=FAULT_RATE))
+    results.append(summarize("gateway_retries", retries, "requests",
+                             holdings=GATEWAY_HOLDINGS, fault_rate=FAULT_RATE))
+    results.append(summarize("gateway_failures", failed, "symbols",
+                             holdings=GATEWAY_HOLDINGS, fault_rate=FAULT_RATE))
+    mount, plot, candles = zip(*(asyncio.run(bench_plots(PLOT_HOLDINGS))
+                                 for _ in range(repeat)))
+    results.append(summarize("ticker_mount", mount, "s",
+                             holdings=PLOT_HOLDINGS))
+    results.append(summarize("ticker_plot_history", plot, "s",
+                             holdings=PLOT_HOLDINGS))
+    results.append(summarize("ticker_plot_candles", candles, "s",
+                             holdings=PLOT_HOLDINGS))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help=f"JSON report path (default {DEFAULT_OUTPUT})")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per benchmark (default 3)")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=STARTUP_SIZES,
+                        help="holdings counts for the startup benchmark")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # Caches and settings stay out of the repo
+        try:
+            results = run(args.repeat, tuple(args.sizes))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Shared fixtures for the tests.
+
+Core is served by the deterministic fake yfinance of the benchmarks and
+its caches live in a temporary directory, so no test touches the
+network or the caches of a real session.
+"""
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import Core  # noqa: E402
+import fake_yfinance  # noqa: E402
+
+SETTINGS = {
+    "PERIOD": "1d",
+    "INTERVAL": "1m",
+    "UPDATE_INTERVAL": 3600,  # Keep the poll timer out of the tests
+    "LOCAL_CURRENCY": "USD",
+    "QUOTE_SOURCE": "poll",
+}
+BAR_TIME = 1_792_000_800  # A Wednesday 14:00 in New York, epoch seconds
+RETRY_BACKOFF = 0.01  # Seconds before the first retry in the tests
+UNTHROTTLED = 1e9  # Token bucket rate and burst that never wait
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """
+    Point Core at fake_yfinance and fresh caches in a temporary directory.
+
+    Returns:
+        Path: The temporary directory, which is the working directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / Core.SETTINGS_FILE).write_text(json.dumps(SETTINGS))
+    monkeypatch.setattr(fake_yfinance, "FAULT_RATE", 0.0)
+    monkeypatch.setattr(Core, "yf", fake_yfinance)
+    monkeypatch.setattr(Core, "GATEWAY", Core.FetchGateway(
+        rate=UNTHROTTLED, burst=UNTHROTTLED, backoff=RETRY_BACKOFF))
+    monkeypatch.setattr(Core, "HISTORY_CACHE", Core.HistoryCache())
+    monkeypatch.setattr(Core, "METADATA_CACHE", Core.MetadataCache())
+    monkeypatch.setattr(Core, "_settings", None)
+    return tmp_path
+
+
+@pytest.fixture
+def make_stock():
+    """
+    Provide a factory of SymbolData with known bars, without the network.
+
+    Returns:
+        callable: Takes symbol, close, currency and the epoch seconds of
+        the bars, and returns the SymbolData of one share bought at
+        close, on a US exchange. Every bar trades at close.
+    """
+    def make(symbol="AAA", close=100.0, currency="USD", times=(BAR_TIME,)):
+        index = pd.to_datetime(list(times), unit="s", utc=True)
+        history = pd.DataFrame({"Open": close, "High": close, "Low": close,
+                                "Close": close, "Volume": 1}, index=index)
+        metadata = {"currency": currency, "minor_unit": 1,
+                    "exchange": "NMS", "timezone": "America/New_York"}
+        return Core.SymbolData.from_history(symbol, 1, close, history,
+                                            metadata)
+    return make
@@ -0,0 +1,203 @@
+"""
+Tests of FetchGateway against a local stand-in for Yahoo Finance.
+
+The stand-in serves chart JSON over HTTP and fails the requests a test
+queues up with rate limits, server errors or dropped connections, so
+the requests go through the real yfinance, curl_cffi and MeteredSession.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import yfinance.base
+import yfinance.data
+import yfinance.scrapers.history
+
+import Core
+import fake_yfinance
+
+DAY = 86400
+BARS = 5  # Daily bars served per chart request
+
+
+def chart(symbol):
+    """
+    Build a Yahoo Finance chart response of BARS daily bars.
+
+    Args:
+        symbol (str): The stock symbol.
+
+    Returns:
+        dict: The decoded JSON payload.
+    """
+    today = int(time.time()) // DAY * DAY + 14 * 3600
+    return {"chart": {"error": None, "result": [{
+        "meta": {"currency": "USD", "symbol": symbol,
+                 "exchangeName": "NMS", "instrumentType": "EQUITY",
+                 "exchangeTimezoneName": "America/New_York",
+                 "timezone": "EST", "gmtoffset": -18000,
+                 "dataGranularity": "1d", "range": "5d",
+                 "validRanges": ["1d", "5d"], "regularMarketPrice": 10.5},
+        "timestamp": [today - DAY * i for i in range(BARS, 0, -1)],
+        "indicators": {"quote": [{"open": [10.0] * BARS,
+                                  "high": [11.0] * BARS,
+                                  "low": [9.0] * BARS,
+                                  "close": [10.5] * BARS,
+                                  "volume": [100] * BARS}]},
+    }]}}
+
+
+class StandInYahoo(BaseHTTPRequestHandler):
+    """
+    Serves chart requests, failing them as listed in faults first.
+
+    Faults are consumed in order: an HTTP status code to answer with,
+    or "drop" to close the connection without a response.
+    """
+    faults = []
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            type(self).requests += 1
+            fault = self.faults.pop(0) if self.faults else None
+        if fault == "drop":
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if fault is not None:  # Yahoo answers errors with a JSON body
+            self.reply(fault, {"finance": {"error": {"code": str(fault)}}})
+            return
+        symbol = self.path.split("?")[0].rsplit("/", 1)[-1]
+        self.reply(200, chart(symbol))
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the test output quiet
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """
+    Route yfinance chart requests to a local StandInYahoo server.
+
+    Returns:
+        type: The handler class, whose faults the test sets.
+    """
+    monkeypatch.setattr(StandInYahoo, "faults", [])
+    monkeypatch.setattr(StandInYahoo, "requests", 0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInYahoo)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(yfinance.scrapers.history, "_BASE_URL_", url)
+    monkeypatch.setattr(yfinance.base, "_BASE_URL_", url)
+    # The chart endpoint needs no cookie or crumb
+    monkeypatch.setattr(yfinance.data.YfData, "_get_cookie_and_crumb",
+                        lambda self, timeout=30: (None, "basic"))
+    yield StandInYahoo
+    server.shutdown()
+    server.server_close()
+
+
+def gateway(retries=3):
+    """
+    Create a gateway without throttling and with short backoffs.
+    """
+    return Core.FetchGateway(rate=1e9, burst=1e9, retries=retries,
+                             backoff=0.001)
+
+
+def fetch(symbol):
+    """
+    Fetch five days of daily bars of a fresh symbol through a gateway.
+    """
+    return gateway().history(symbol, period="5d", interval="1d")
+
+
+def test_yfinance_raises_request_failures():
+    assert yfinance.config.debug.hide_exceptions is False
+
+
+@pytest.mark.parametrize("fault", [429, 500, 503, "drop"])
+def test_transient_failures_are_retried(yahoo, fault):
+    retries = Core.METRICS.counters.get("fetch_retries", 0)
+    yahoo.faults = [fault, fault]
+    history = fetch(f"RETRY{fault}")
+    assert len(history) == BARS
+    assert Core.METRICS.counters["fetch_retries"] > retries
+    assert not yahoo.faults
+
+
+def test_server_errors_fail_after_the_retries(yahoo):
+    yahoo.faults = [500] * 100
+    with pytest.raises(Exception) as raised:
+        fetch("DOWN")
+    assert Core.is_transient(raised.value)
+
+
+def test_refused_connection_is_transient():
+    with socket.socket() as unused:  # Bind a port, then free it
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    with pytest.raises(Exception) as raised:
+        gateway(retries=0).call(
+            ("refused",),
+            lambda: Core.SESSION.get(f"http://127.0.0.1:{port}"))
+    assert Core.is_transient(raised.value)
+
+
+def test_client_errors_are_not_retried(yahoo):
+    yahoo.faults = [404] * 100
+    with pytest.raises(Exception) as raised:
+        fetch("MISSING")
+    assert not Core.is_transient(raised.value)
+    assert yahoo.requests <= 2  # yfinance retries once with a new cookie
+
+
+def download(monkeypatch, tickers, missing_attempts):
+    """
+    Download FX rates through the gateway, leaving the last ticker out
+    of the first missing_attempts responses.
+
+    Returns:
+        tuple: The downloaded DataFrame and the number of attempts.
+    """
+    attempts = []
+    complete = fake_yfinance.download
+
+    def flaky(tickers, **kwargs):
+        attempts.append(tickers)
+        if len(attempts) <= missing_attempts:
+            tickers = tickers[:-1]
+        return complete(tickers, **kwargs)
+
+    monkeypatch.setattr(fake_yfinance, "download", flaky)
+    history = Core.GATEWAY.download(tickers, period="1d", interval="1m",
+                                    group_by="ticker", progress=False)
+    return history, len(attempts)
+
+
+def test_missing_download_tickers_are_retried(offline, monkeypatch):
+    history, attempts = download(monkeypatch, ["EUR=X", "GBP=X"],
+                                 missing_attempts=1)
+    assert "GBP=X" in history
+    assert attempts == 2
+
+
+def test_download_keeps_the_tickers_that_arrived(offline, monkeypatch):
+    history, attempts = download(monkeypatch, ["EUR=X", "GBP=X"],
+                                 missing_attempts=100)
+    assert "EUR=X" in history and "GBP=X" not in history
+    assert attempts == Core.GATEWAY.retries + 1
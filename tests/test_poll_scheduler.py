@@ -0,0 +1,43 @@
+"""
+Tests of PollScheduler deciding how often symbols are polled.
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import Core
+
+# A Wednesday afternoon, while the exchange is open
+NOW = datetime(2026, 10, 14, 14, 0,
+               tzinfo=ZoneInfo("America/New_York")).timestamp()
+
+
+def poll(scheduler, stocks, close, now):
+    """
+    Apply the bar a refresh would fetch, then record the poll.
+    """
+    stocks["AAA"].apply_bar(int(now) // 60 * 60, close, close, close, close,
+                            1)
+    scheduler.polled(stocks, ["AAA"], now)
+
+
+def test_moving_symbol_is_polled_more_often(offline, make_stock):
+    scheduler = Core.PollScheduler()
+    stocks = {"AAA": make_stock(times=[NOW - 60])}
+    update = Core.get_settings().UPDATE_INTERVAL
+    scheduler.polled(stocks, ["AAA"], NOW)
+    later = NOW + update
+    poll(scheduler, stocks, 101.0, later)  # Moved 1% since the last poll
+    assert scheduler.interval(stocks["AAA"], later) == (
+        update * Core.POLL_FACTORS["active"])
+    assert scheduler.due(stocks, later + update / 2) == ["AAA"]
+
+
+def test_quiet_symbol_is_polled_every_update_interval(offline, make_stock):
+    scheduler = Core.PollScheduler()
+    stocks = {"AAA": make_stock(times=[NOW - 60])}
+    update = Core.get_settings().UPDATE_INTERVAL
+    scheduler.polled(stocks, ["AAA"], NOW)
+    later = NOW + update
+    poll(scheduler, stocks, 100.01, later)
+    assert scheduler.interval(stocks["AAA"], later) == update
+    assert scheduler.due(stocks, later + update / 2) == []
@@ -0,0 +1,114 @@
+"""
+Tests of SymbolWatcher with a local stand-in quote feed.
+"""
+import asyncio
+import time
+
+import pandas as pd
+
+import App
+import Core
+
+HOLDINGS = {"AAA": [1, 100.0]}
+
+
+class LocalFeed(Core.QuoteSource):
+    """
+    Stand-in push source that applies the ticks a test hands it.
+    """
+
+    starts = 0  # Times start() was called
+
+    def start(self, stock_manager, on_quotes):
+        self.starts += 1
+        self.stock_manager = stock_manager
+        self.on_quotes = on_quotes
+
+    def push(self, symbol, price):
+        """
+        Apply a trade within the last bar, like a streamed quote.
+
+        Args:
+            symbol (str): The stock symbol.
+            price (float): The traded price.
+        """
+        timestamp = int(self.stock_manager[symbol].timestamps[-1])
+        if self.stock_manager.apply_tick(symbol, price, timestamp):
+            self.on_quotes({symbol})
+
+
+def test_ticks_from_local_feed_reach_price_display(offline):
+    feed = LocalFeed()
+
+    async def run():
+        app = App.SymbolWatcher(holdings=HOLDINGS, quote_source=feed)
+        async with app.run_test() as pilot:
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            await pilot.press("a")  # Show the ticker
+            await pilot.pause()
+            display = app.query_one(App.TickerPriceDisplay)
+            before = display.value
+            feed.push("AAA", 123.45)
+            await pilot.pause(2 * App.TICK_FLUSH)
+            after = display.value
+            app.currency_convert.stop()
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert before != "123.45"
+    assert after == "123.45"
+
+
+def test_reload_keeps_the_running_source(offline):
+    feed = LocalFeed()
+
+    async def run():
+        app = App.SymbolWatcher(holdings=HOLDINGS, quote_source=feed)
+        async with app.run_test() as pilot:
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            app.load_symbols(reload_history=True)  # E.g. PERIOD changed
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            app.currency_convert.stop()
+
+    asyncio.run(run())
+    assert feed.starts == 1
+
+
+class Recorder:
+    """
+    Stand-in StockManager that records the bars a replay applies.
+    """
+
+    def __init__(self):
+        self.applied = []
+
+    def apply_bar(self, symbol, timestamp, *bar):
+        self.applied.append(timestamp)
+        return True
+
+
+def wait_for(condition, timeout=5):
+    """
+    Poll condition until it holds or timeout seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_restarted_replay_resumes_after_applied_bars():
+    index = pd.date_range("2026-01-02 14:30", periods=5, freq="1min",
+                          tz="UTC")
+    bars = pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0,
+                         "Close": 1.0, "Volume": 1}, index=index)
+    source = Core.ReplayQuoteSource({"AAA": bars}, speed=1e6)
+    recorder = Recorder()
+    source.start(recorder, lambda symbols: None)
+    wait_for(lambda: len(recorder.applied) == len(index))
+    source.start(recorder, lambda symbols: None)
+    source.thread.join(timeout=5)
+    source.stop()
+    assert recorder.applied == list(index.as_unit("s").asi8)
@@ -0,0 +1,14 @@
+"""
+Tests of StockManager refreshing the managed symbols.
+"""
+import Core
+
+
+def test_refresh_skips_symbols_dropped_meanwhile(offline, make_stock):
+    manager = Core.StockManager()
+    manager.replace([make_stock("AAA"), make_stock("BBB")])
+    due = list(manager.stocks)  # Snapshot of a poll, then a reload
+    manager.replace([make_stock("AAA")])
+    updated, failures = manager.refresh(due)
+    assert set(updated) <= {"AAA"}
+    assert not failures
@@ -0,0 +1,42 @@
+"""
+Tests of SymbolData merging fetched bars with the stored ones.
+"""
+import pandas as pd
+
+import Core
+from conftest import BAR_TIME
+
+
+def bars(times, close):
+    """
+    Build the DataFrame of bars a history request returns.
+    """
+    index = pd.to_datetime(list(times), unit="s", utc=True)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close,
+                         "Close": close, "Volume": 1}, index=index)
+
+
+def test_refresh_merges_with_bars_opened_during_the_fetch(offline,
+                                                          make_stock,
+                                                          monkeypatch):
+    stock = make_stock(times=[BAR_TIME - 120, BAR_TIME - 60, BAR_TIME])
+
+    def history(symbol, **request):  # A tick opens a bar meanwhile
+        stock.apply_tick(101.0, BAR_TIME + 60)
+        return bars([BAR_TIME, BAR_TIME + 60], 102.0)
+
+    monkeypatch.setattr(Core.GATEWAY, "history", history)
+    assert stock.refresh()
+    assert stock.timestamps.tolist() == [BAR_TIME - 120, BAR_TIME - 60,
+                                         BAR_TIME, BAR_TIME + 60]
+    assert stock.close[-1] == 102.0
+
+
+def test_warm_start_without_new_bars_counts_as_fetched(offline,
+                                                       monkeypatch):
+    Core.SymbolData("AAA", 1, 100.0)  # Fills the caches
+    monkeypatch.setattr(Core.GATEWAY, "history",
+                        lambda symbol, **request: bars([], 0.0))
+    stock = Core.SymbolData("AAA", 1, 100.0)
+    assert stock.fetched == stock.timestamps[-1]
+    Core.PollScheduler().due({"AAA": stock})
@@ -0,0 +1,43 @@
+"""
+Tests of PortfolioValuation only re-reading the symbols that changed.
+"""
+import numpy as np
+
+import Core
+
+
+def valuation(*stocks):
+    """
+    Value stocks with a USD rate and no rate for any other currency.
+    """
+    manager = Core.StockManager()
+    manager.replace(stocks)
+    convert = Core.CurrencyConvert(manager)  # Knows only USD
+    result = Core.PortfolioValuation(manager, convert)
+    result.update()
+    return manager, result
+
+
+def tick(manager, symbol, price):
+    """
+    Apply a trade within the last bar of a symbol.
+    """
+    timestamp = int(manager[symbol].timestamps[-1])
+    manager.apply_tick(symbol, price, timestamp)
+
+
+def test_missing_rate_does_not_mark_its_symbols_dirty(offline, make_stock):
+    manager, result = valuation(make_stock("AAA"),
+                                make_stock("BBB", currency="XYZ"))
+    tick(manager, "AAA", 101.0)
+    rates = np.array([result.currency_convert.rate(currency)
+                      for currency in result.currencies])
+    assert list(result.dirty(rates)) == [0]
+
+
+def test_added_symbol_rebuilds_the_arrays(offline, make_stock):
+    manager, result = valuation(make_stock("AAA"))
+    manager.add_stock(make_stock("BBB", close=50.0))
+    result.update()
+    assert result.symbols == ["AAA", "BBB"]
+    assert result.total == 150.0